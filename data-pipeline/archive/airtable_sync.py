@@ -4,31 +4,275 @@
 # This script coordinates the entire sync process, handling errors and maintaining state
 
 import os
+import io
+import re
+import csv
 import sys
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+import logging.handlers
+import atexit
+import queue
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Any, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import psycopg2
+from psycopg2 import sql
 from psycopg2.extras import RealDictCursor, Json
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.pool import ThreadedConnectionPool
 import time
-from dataclasses import dataclass, asdict
+import random
+import threading
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
 import hashlib
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; FastJson and _load_json fall back to the stdlib
+    orjson = None
+
 # Configure logging with detailed formatting for debugging
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler('sync.log'),
         logging.StreamHandler()
     ]
 )
+
+# sync.log is written by a background listener so that file I/O doesn't
+# happen on the threads fetching and loading data
+_log_queue: queue.Queue = queue.Queue(-1)
+_file_handler = logging.FileHandler('sync.log')
+_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+_log_listener = logging.handlers.QueueListener(_log_queue, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(_log_queue))
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+
+def _build_adapter() -> HTTPAdapter:
+    """
+    Builds the connection pool shared by every AirTable client in the process.
+    
+    All AirTable calls go to the same host, so a single pool keeps TLS
+    connections alive across tables and client instances. Transient server
+    errors are retried by urllib3 instead of hand-rolled loops; 429
+    responses are left to the caller so they can feed the rate limiter.
+    """
+    return HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=['GET']
+        )
+    )
+
+
+def _build_session(api_key: str) -> requests.Session:
+    """
+    Builds one client's HTTP session on the shared connection pool.
+    
+    Each client gets its own session so its Authorization header cannot be
+    overwritten by another client's. Pages are requested gzip-encoded,
+    which shrinks the JSON several-fold.
+    """
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+        'Accept-Encoding': 'gzip',
+    })
+    session.mount('https://', _ADAPTER)
+    session.mount('http://', _ADAPTER)
+    return session
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter for AirTable's 5 requests per second per base.
+    
+    Rather than sleeping a fixed delay before every call, we remember when the
+    last few requests were made and only wait once the window is full. A small
+    table therefore pays no throttling cost at all, and bursts can use the
+    full quota. When AirTable reports through its headers that the quota is
+    spent, every caller pauses until it recovers.
+    
+    Calls are also spaced by an AIMD-controlled interval that converges on
+    the fastest rate AirTable accepts: it shrinks additively while AirTable
+    keeps answering and doubles when it pushes back. The interval is shared
+    by every caller and only changed under the lock.
+    """
+    
+    MIN_INTERVAL = 0.05
+    MAX_INTERVAL = 2.0
+    INTERVAL_DECREASE = 0.01
+    INTERVAL_BACKOFF = 2.0
+    
+    def __init__(self, max_calls: int = 5, period: float = 1.0, interval: float = 0.2):
+        self.max_calls = max_calls
+        self.period = period
+        self.interval = interval
+        self._calls: Deque[float] = deque()
+        self._last_call: Optional[float] = None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        
+    def set_initial_interval(self, interval: float):
+        """Sets the starting interval, unless requests have already adapted it."""
+        with self._lock:
+            if self._last_call is None:
+                self.interval = interval
+        
+    def acquire(self):
+        """Blocks until another request fits within the window."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.period:
+                    self._calls.popleft()
+                    
+                wait = self._blocked_until - now
+                if len(self._calls) >= self.max_calls:
+                    wait = max(wait, self._calls[0] + self.period - now)
+                if self._last_call is not None:
+                    wait = max(wait, self._last_call + self.interval - now)
+                if wait <= 0:
+                    self._calls.append(now)
+                    self._last_call = now
+                    return
+            time.sleep(wait)
+            
+    def observe(self, response: requests.Response):
+        """
+        Reads AirTable's rate-limit headers from a response and applies one
+        AIMD step to the interval.
+        
+        Retry-After takes precedence; otherwise an exhausted
+        x-ratelimit-remaining pauses callers for one window. When neither
+        header is present the window and interval alone govern the pace.
+        """
+        pause = None
+        retry_after = response.headers.get('Retry-After')
+        remaining = response.headers.get('x-ratelimit-remaining')
+        try:
+            if retry_after is not None:
+                pause = float(retry_after)
+            elif remaining is not None and int(remaining) <= 0:
+                pause = self.period
+        except ValueError:
+            pass
+            
+        status_code = response.status_code
+        with self._lock:
+            if pause:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            if status_code == 429 or status_code >= 500:
+                self.interval = min(self.MAX_INTERVAL, self.interval * self.INTERVAL_BACKOFF)
+            elif status_code < 300:
+                self.interval = max(self.MIN_INTERVAL, self.interval - self.INTERVAL_DECREASE)
+
+
+# Field-name rewrites shared with the DDL generation, applied in one pass
+_COLUMN_NAME_TRANSLATION = str.maketrans({
+    ' ': '_',
+    '(': None,
+    ')': None,
+    '%': 'pct',
+    '/': '_',
+    '-': '_',
+})
+# Anything that is not a letter, digit or underscore (Unicode-aware, like isalnum)
+_NON_IDENTIFIER_CHARS = re.compile(r'\W')
+
+class FastJson(Json):
+    """
+    JSONB adapter that serializes with orjson when it is available.
+    
+    psycopg2's Json uses json.dumps, which is several times slower and
+    dominates transform time for tables with many attachment and metadata
+    fields.
+    """
+    
+    def dumps(self, obj: Any) -> str:
+        if orjson is None:
+            return super().dumps(obj)
+        return orjson.dumps(obj).decode()
+
+
+def _load_json(response: requests.Response) -> Any:
+    """
+    Parses a JSON response body, with orjson when it is available.
+    
+    orjson decodes the raw bytes directly, skipping requests' text decoding
+    and the much slower stdlib parser on multi-megabyte AirTable pages.
+    """
+    if orjson is None:
+        return response.json()
+    return orjson.loads(response.content)
+
+
+# Returned by a value handler when the field should not become a column
+_SKIP_FIELD = object()
+
+# How AirTable serializes a NaN formula result
+_NAN_PLACEHOLDER = sys.intern('{"specialValue": "NaN"}')
+
+
+def _passthrough(value: Any) -> Any:
+    """Scalars map directly onto PostgreSQL types."""
+    return value
+
+
+def _handle_str(value: str) -> Optional[str]:
+    """Strings pass through, except AirTable's NaN placeholder becomes NULL."""
+    if value == _NAN_PLACEHOLDER:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Converting JSON NaN string to NULL")
+        return None
+    return value
+
+
+def _handle_list(value: list) -> Any:
+    """Lists of record IDs are relationships; anything else is stored as JSON."""
+    if value and isinstance(value[0], str) and value[0].startswith('rec'):
+        # This is a relationship field - we'll handle it separately
+        return _SKIP_FIELD
+    return FastJson(value)
+
+
+def _handle_dict(value: dict) -> Any:
+    """Objects are stored as JSON, except a NaN formula result becomes NULL."""
+    if value.get('specialValue') == 'NaN':
+        return None
+    return FastJson(value)
+
+
+def _to_json(value: Any) -> FastJson:
+    """Complex types get JSON serialization."""
+    return FastJson(value)
+
+
+# Module-level singletons so subclasses such as FixedAirTableClient share the
+# connection pool, and concurrent table fetches share AirTable's rate budget
+_ADAPTER = _build_adapter()
+_LIMITER = RateLimiter()
+_REQUEST_SLOTS = threading.BoundedSemaphore(5)
+
+@dataclass(frozen=True, slots=True)
 class SyncConfig:
     """
     Configuration for the synchronization process.
@@ -37,6 +281,9 @@ class SyncConfig:
     to adjust settings without diving into the code. Think of this as the 
     control panel for your synchronization system - all the knobs and switches
     are here.
+    
+    Values are captured once when the config is built and can't change
+    during a run; the worker threads all read the same settings.
     """
     # AirTable configuration
     airtable_base_id: str
@@ -53,14 +300,23 @@ class SyncConfig:
     
     # Sync behavior configuration
     batch_size: int = 100  # Records to process at once
-    rate_limit_delay: float = 0.2  # Seconds between AirTable API calls (5 req/sec limit)
+    rate_limit_delay: float = 0.2  # Initial interval between AirTable API calls, adapted at runtime
     retry_attempts: int = 3
     retry_delay: float = 1.0
+    request_timeout: float = 30.0  # Seconds to wait on an AirTable response
     
     # Sync strategy
     sync_mode: str = "incremental"  # "full" or "incremental"
     track_changes: bool = True
     
+    # AirTable field names to request per table. Tables not listed here have
+    # their projection derived from the target table's columns at startup.
+    table_fields: Dict[str, List[str]] = field(default_factory=dict)
+    
+    # AirTable "Last modified time" field per table, used for incremental
+    # filters. Tables not listed here are detected through the meta API.
+    last_modified_fields: Dict[str, str] = field(default_factory=dict)
+    
     @classmethod
     def from_env(cls) -> 'SyncConfig':
         """
@@ -87,13 +343,26 @@ class AirTableClient:
     and politely (respecting rate limits).
     """
     
+    # Incremental filters, formatted with str.format. Filtering on a real
+    # "Last modified time" field lets AirTable use it directly rather than
+    # evaluating LAST_MODIFIED_TIME() for every record.
+    MODIFIED_SINCE_FORMULA = "IS_AFTER(LAST_MODIFIED_TIME(), '{since}')"
+    FIELD_MODIFIED_SINCE_FORMULA = "IS_AFTER({{{field}}}, '{since}')"
+    
+    # Value conversion per JSON type; unlisted types fall back to _to_json
+    _value_handlers = {
+        str: _handle_str,
+        int: _passthrough,
+        float: _passthrough,
+        bool: _passthrough,
+        type(None): _passthrough,
+        list: _handle_list,
+        dict: _handle_dict,
+    }
+    
     def __init__(self, config: SyncConfig):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Authorization': f'Bearer {config.airtable_api_key}',
-            'Content-Type': 'application/json'
-        })
+        self.session = _build_session(config.airtable_api_key)
         
         # Table ID mappings discovered from our documentation parsing
         self.table_ids = {
@@ -106,11 +375,71 @@ class AirTableClient:
             'commodities': 'tblawXefYSXa6UFSX',
             'price_lists': 'tbl0B7ON9dDTtj3mP'
         }
+        self._limiter = _LIMITER
+        self._limiter.set_initial_interval(config.rate_limit_delay)
+        
+        # AirTable field names requested per table; unlisted tables get all fields
+        self.table_fields: Dict[str, List[str]] = dict(config.table_fields)
+        self.last_modified_fields: Dict[str, str] = dict(config.last_modified_fields)
+        
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """
+        Issues one rate-limited GET, backing off when AirTable returns 429.
+        
+        Backoff is exponential with jitter so that concurrent table fetches
+        don't all retry in lockstep.
+        
+        Pacing is left entirely to the shared limiter, which enforces the
+        hard window, AirTable's quota headers and the adaptive interval.
+        """
+        for attempt in range(self.config.retry_attempts + 1):
+            self._limiter.acquire()
+            with _REQUEST_SLOTS:
+                response = self.session.get(url, params=params,
+                                            timeout=self.config.request_timeout)
+            self._limiter.observe(response)
+            
+            if response.status_code != 429 or attempt == self.config.retry_attempts:
+                break
+                
+            delay = self.config.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.warning("Rate limited by AirTable, retrying in %.2fs", delay)
+            time.sleep(delay)
+            
+        return response
+        
+    def fetch_table_fields(self) -> Dict[str, List[Dict]]:
+        """
+        Lists the AirTable fields of every known table via the meta API.
+        
+        Returns a mapping of our table names to their field definitions,
+        each a dict with at least 'name' and 'type'.
+        """
+        url = f"{self.config.airtable_api_url}/meta/bases/{self.config.airtable_base_id}/tables"
+        response = self._get(url, {})
+        response.raise_for_status()
+        
+        names_by_id = {table_id: name for name, table_id in self.table_ids.items()}
+        return {
+            names_by_id[table['id']]: table.get('fields', [])
+            for table in _load_json(response).get('tables', [])
+            if table['id'] in names_by_id
+        }
         
     def fetch_table_records(self, table_name: str, 
                            modified_since: Optional[datetime] = None) -> List[Dict]:
         """
-        Fetches all records from a specific AirTable table.
+        Fetches all records from a specific AirTable table into a list.
+        
+        Convenience wrapper around iter_table_records for callers that need
+        the whole table at once.
+        """
+        return list(self.iter_table_records(table_name, modified_since))
+        
+    def iter_table_records(self, table_name: str,
+                           modified_since: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        Yields the records of a specific AirTable table, page by page.
         
         This method handles AirTable's pagination automatically. AirTable returns
         at most 100 records per request, so we need to make multiple requests
@@ -120,6 +449,9 @@ class AirTableClient:
         The modified_since parameter enables incremental sync - we only fetch
         records that changed since our last sync, dramatically reducing data
         transfer and processing time.
+        
+        Pages are requested lazily as the caller consumes records, so only one
+        page needs to be held in memory at a time.
         """
         if table_name not in self.table_ids:
             raise ValueError(f"Unknown table: {table_name}")
@@ -127,45 +459,65 @@ class AirTableClient:
         table_id = self.table_ids[table_name]
         url = f"{self.config.airtable_api_url}/{self.config.airtable_base_id}/{table_id}"
         
-        all_records = []
+        total = 0
         offset = None
         
         # Build filter formula for incremental sync
         params = {'pageSize': 100}
+        if self.table_fields.get(table_name):
+            # Only transfer the fields that end up in PostgreSQL
+            params['fields[]'] = self.table_fields[table_name]
         if modified_since:
             # AirTable's formula syntax for date comparison
-            formula = f"IS_AFTER(LAST_MODIFIED_TIME(), '{modified_since.isoformat()}')"
-            params['filterByFormula'] = formula
+            since = modified_since.isoformat()
+            modified_field = self.last_modified_fields.get(table_name)
+            if modified_field:
+                params['filterByFormula'] = self.FIELD_MODIFIED_SINCE_FORMULA.format(
+                    field=modified_field, since=since)
+                params['sort[0][field]'] = modified_field
+                params['sort[0][direction]'] = 'asc'
+            else:
+                params['filterByFormula'] = self.MODIFIED_SINCE_FORMULA.format(since=since)
             
         while True:
             if offset:
                 params['offset'] = offset
                 
-            # Respect rate limits
-            time.sleep(self.config.rate_limit_delay)
-            
             try:
-                response = self.session.get(url, params=params)
+                response = self._get(url, params)
                 response.raise_for_status()
-                data = response.json()
+                data = _load_json(response)
                 
                 records = data.get('records', [])
-                all_records.extend(records)
+                total += len(records)
                 
                 # Check if there are more pages
                 offset = data.get('offset')
-                if not offset:
-                    break
                     
-                logger.info(f"Fetched {len(records)} records from {table_name}, "
-                          f"total so far: {len(all_records)}")
-                          
             except requests.exceptions.RequestException as e:
-                logger.error(f"Error fetching from {table_name}: {e}")
+                logger.error("Error fetching from %s: %s", table_name, e)
                 raise
                 
-        logger.info(f"Completed fetching {len(all_records)} total records from {table_name}")
-        return all_records
+            yield from records
+            if not offset:
+                break
+                
+            logger.info("Fetched %d records from %s, total so far: %d",
+                        len(records), table_name, total)
+                
+        logger.info("Completed fetching %d total records from %s", total, table_name)
+    
+    def transform_batch(self, records: List[Dict], table_name: str) -> List[Dict]:
+        """
+        Transforms a page of AirTable records into PostgreSQL-compatible rows.
+        
+        This is the entry point the orchestrator uses, so the whole page is
+        available at once. The base implementation applies transform_record
+        to each record; subclasses can override it to validate or convert
+        entire columns in a single pass instead of value by value.
+        """
+        transform = self.transform_record
+        return [transform(record, table_name) for record in records]
     
     def transform_record(self, record: Dict, table_name: str) -> Dict:
         """
@@ -179,6 +531,11 @@ class AirTableClient:
         
         Think of this as a translator that not only translates words but also
         converts cultural concepts between two different systems.
+        
+        Conversions are looked up by exact value type in _value_handlers, so
+        each field costs one dict lookup instead of a chain of isinstance
+        checks. Attribute and global lookups are bound to locals up front
+        since the loop runs once per field of every record.
         """
         transformed = {
             'airtable_record_id': record['id'],
@@ -186,43 +543,96 @@ class AirTableClient:
         }
         
         fields = record.get('fields', {})
+        get_handler = self._value_handlers.get
+        sanitize = self._sanitize_column_name
+        skip, fallback = _SKIP_FIELD, _to_json
         
         for field_name, value in fields.items():
-            # Convert field name to PostgreSQL column name
-            pg_column = self._sanitize_column_name(field_name)
-            
-            # Handle different value types
-            if isinstance(value, list) and value and value[0].startswith('rec'):
-                # This is a relationship field - we'll handle it separately
+            converted = get_handler(type(value), fallback)(value)
+            if converted is skip:
                 continue
-            elif isinstance(value, (int, float, str, bool)) or value is None:
-                transformed[pg_column] = value
-            else:
-                # Complex types get JSON serialization
-                transformed[pg_column] = Json(value)
+                
+            # Convert field name to PostgreSQL column name
+            transformed[sanitize(field_name)] = converted
                 
         return transformed
     
-    def _sanitize_column_name(self, name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _sanitize_column_name(name: str) -> str:
         """
         Converts AirTable field names to PostgreSQL column names.
         
         This mirrors the logic we used in our DDL generation - ensuring
         consistency between what we expect in the database and what we're
         inserting.
+        
+        A base has only a few dozen distinct field names, reused across
+        every record, so results are cached per name.
         """
-        safe = name.lower()
-        safe = safe.replace(' ', '_')
-        safe = safe.replace('(', '')
-        safe = safe.replace(')', '')
-        safe = safe.replace('%', 'pct')
-        safe = safe.replace('/', '_')
-        safe = safe.replace('-', '_')
+        safe = name.lower().translate(_COLUMN_NAME_TRANSLATION)
         
         # Remove any remaining special characters
-        safe = ''.join(c if c.isalnum() or c == '_' else '' for c in safe)
-        
-        return safe
+        return _NON_IDENTIFIER_CHARS.sub('', safe)
+
+
+def _to_pg_text(value: Any) -> Any:
+    """
+    Renders JSON and bytea values as the text PostgreSQL parses for them;
+    other values are returned unchanged.
+    """
+    if isinstance(value, Json):
+        return value.dumps(value.adapted)
+    if isinstance(value, bytes):
+        # bytea hex input format
+        return '\\x' + value.hex()
+    return value
+
+
+def _to_copy_value(value: Any) -> Any:
+    """Renders one value for COPY ... WITH (FORMAT CSV, NULL '\\N')."""
+    if value is None:
+        return '\\N'
+    return _to_pg_text(value)
+
+
+def _json_default(value: Any) -> Any:
+    """Lets the JSON encoders see through psycopg2's Json wrapper."""
+    if isinstance(value, Json):
+        return value.adapted
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _content_hash(record: Dict) -> bytes:
+    """
+    Fingerprints a transformed record for change detection.
+    
+    blake2b is in the standard library and faster than sha256; 16 bytes is
+    plenty to tell versions of one record apart.
+    """
+    if orjson is None:
+        payload = json.dumps(record, sort_keys=True, default=_json_default).encode()
+    else:
+        payload = orjson.dumps(record, default=_json_default, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _to_copy_buffer(rows: List[tuple]) -> io.StringIO:
+    """Serializes rows into an in-memory CSV stream for cursor.copy_expert."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        writer.writerow([_to_copy_value(value) for value in row])
+    buffer.seek(0)
+    return buffer
+
+
+class _UpsertStatements(NamedTuple):
+    """SQL for staging a batch of rows and merging it into one table."""
+    create_staging: sql.Composed
+    copy: sql.Composed
+    merge: sql.Composed
+    drop_staging: sql.Composed
 
 
 class PostgreSQLSync:
@@ -238,15 +648,128 @@ class PostgreSQLSync:
         self.config = config
         
         # Connection pooling improves performance by reusing database connections
-        # instead of creating new ones for each operation
-        self.pool = SimpleConnectionPool(
-            1, 20,  # Min and max connections
+        # instead of creating new ones for each operation. The threaded pool is
+        # safe to share between the orchestrator's concurrent table syncs.
+        self.pool = ThreadedConnectionPool(
+            4, 20,  # Min and max connections
             host=config.postgres_host,
             port=config.postgres_port,
             database=config.postgres_database,
             user=config.postgres_user,
             password=config.postgres_password
         )
+        self._ensure_sync_state_table()
+        
+        # Written columns and upsert SQL per table, built on first use
+        self._columns: Dict[str, List[str]] = {}
+        self._upsert_sql: Dict[str, _UpsertStatements] = {}
+        
+    def _ensure_sync_state_table(self):
+        """
+        Creates the table holding each table's incremental sync cursor.
+        
+        The cursor is the AirTable-side point in time up to which changes
+        have been loaded, which is independent of when rows were written
+        locally.
+        """
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.config.postgres_schema}.sync_state (
+                        table_name TEXT PRIMARY KEY,
+                        cursor TIMESTAMPTZ,
+                        last_run TIMESTAMPTZ
+                    )
+                """)
+            conn.commit()
+        finally:
+            self.return_connection(conn)
+        
+    def ensure_content_hash_columns(self, table_names: List[str]):
+        """
+        Adds the content_hash column used to skip unchanged records.
+        
+        Incremental fetches often return records whose mapped values are
+        identical to what is stored. Upserts only overwrite a row when its
+        hash differs, so those records cost no write at all.
+        """
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                for table_name in table_names:
+                    cursor.execute(sql.SQL(
+                        "ALTER TABLE {} ADD COLUMN IF NOT EXISTS content_hash BYTEA"
+                    ).format(sql.Identifier(self.config.postgres_schema, table_name)))
+            conn.commit()
+        finally:
+            self.return_connection(conn)
+            
+    def load_table_columns(self, table_names: List[str]):
+        """
+        Reads the written columns of several tables in one catalog query.
+        
+        Called once at the start of a run, so later get_table_columns calls
+        are served from the cache instead of querying information_schema
+        per table.
+        """
+        self.ensure_content_hash_columns(table_names)
+        columns: Dict[str, List[str]] = {table_name: [] for table_name in table_names}
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT table_name, column_name FROM information_schema.columns
+                    WHERE table_schema = %s AND table_name = ANY(%s)
+                      AND column_default IS NULL
+                    ORDER BY table_name, ordinal_position
+                """, (self.config.postgres_schema, list(table_names)))
+                for table_name, column_name in cursor.fetchall():
+                    columns[table_name].append(column_name)
+        finally:
+            self.return_connection(conn)
+        self._columns.update(columns)
+        
+    def invalidate_table_columns(self):
+        """Drops cached columns and upsert SQL after the schema has changed."""
+        self._columns.clear()
+        self._upsert_sql.clear()
+        
+    def get_table_columns(self, table_name: str) -> List[str]:
+        """
+        Lists the columns a sync writes for a table, in table order.
+        
+        Columns with a database default (the serial key, created_at,
+        updated_at, sync_status) are maintained by PostgreSQL or set by the
+        upsert itself, so they are left out. The list is read from
+        information_schema once per table and cached.
+        """
+        columns = self._columns.get(table_name)
+        if columns is None:
+            self.ensure_content_hash_columns([table_name])
+            conn = self.get_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT column_name FROM information_schema.columns
+                        WHERE table_schema = %s AND table_name = %s
+                          AND column_default IS NULL
+                        ORDER BY ordinal_position
+                    """, (self.config.postgres_schema, table_name))
+                    columns = [row[0] for row in cursor.fetchall()]
+            finally:
+                self.return_connection(conn)
+            self._columns[table_name] = columns
+        return columns
+            
+    def map_column_name(self, table_name: str, column_name: str) -> str:
+        """
+        Maps a sanitized field name onto its PostgreSQL column.
+        
+        Names match one to one here; subclasses with explicit mappings for
+        irregular field names override this.
+        """
+        return column_name
         
     def get_connection(self):
         """Gets a connection from the pool."""
@@ -256,6 +779,66 @@ class PostgreSQLSync:
         """Returns a connection to the pool for reuse."""
         self.pool.putconn(conn)
         
+    def _get_upsert_statements(self, table_name: str) -> _UpsertStatements:
+        """
+        Returns the staging and merge SQL for a table, composing it once.
+        
+        Every statement binds the table's full column list, so there is a
+        single canonical upsert per table and PostgreSQL can reuse its plan.
+        """
+        statements = self._upsert_sql.get(table_name)
+        if statements is None:
+            columns = tuple(self.get_table_columns(table_name))
+            target = sql.Identifier(self.config.postgres_schema, table_name)
+            staging = sql.Identifier(f"staging_{table_name}")
+            column_list = sql.SQL(',').join(map(sql.Identifier, columns))
+            all_columns = columns + ('sync_status', 'updated_at')
+            
+            # Build the UPDATE clause for conflicts
+            update_list = sql.SQL(',').join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(col))
+                for col in all_columns
+                if col != 'airtable_record_id'
+            )
+            content_hash = sql.Identifier('content_hash')
+            
+            statements = _UpsertStatements(
+                # The staging table carries only the written columns, with
+                # no constraints or sequence defaults from the target
+                create_staging=sql.SQL("""
+                    CREATE TEMP TABLE {staging} ON COMMIT DROP AS
+                    SELECT {columns} FROM {target} WITH NO DATA
+                """).format(staging=staging, columns=column_list, target=target),
+                copy=sql.SQL(
+                    "COPY {staging} ({columns}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')"
+                ).format(staging=staging, columns=column_list),
+                # Insert/update totals are counted server-side so only one row
+                # comes back per batch instead of one per record
+                merge=sql.SQL("""
+                    WITH upsert AS (
+                        INSERT INTO {target} ({all_columns})
+                        SELECT {columns}, 'synced', %s FROM {staging}
+                        ON CONFLICT (airtable_record_id)
+                        DO UPDATE SET {updates}
+                        WHERE {target}.{content_hash} IS DISTINCT FROM EXCLUDED.{content_hash}
+                        RETURNING (xmax = 0) AS inserted
+                    )
+                    SELECT count(*) FILTER (WHERE inserted),
+                           count(*) FILTER (WHERE NOT inserted)
+                    FROM upsert
+                """).format(
+                    target=target,
+                    all_columns=sql.SQL(',').join(map(sql.Identifier, all_columns)),
+                    columns=column_list,
+                    staging=staging,
+                    updates=update_list,
+                    content_hash=content_hash
+                ),
+                drop_staging=sql.SQL("DROP TABLE {staging}").format(staging=staging)
+            )
+            self._upsert_sql[table_name] = statements
+        return statements
+        
     def upsert_records(self, table_name: str, records: List[Dict]) -> Tuple[int, int]:
         """
         Performs an UPSERT operation (INSERT or UPDATE) for multiple records.
@@ -268,60 +851,68 @@ class PostgreSQLSync:
         
         PostgreSQL's ON CONFLICT clause makes this atomic, preventing race
         conditions in concurrent scenarios.
+        
+        Rows are bulk-loaded with COPY into a temporary staging table and then
+        merged with a single INSERT ... SELECT ... ON CONFLICT, so PostgreSQL
+        parses and plans one statement per batch rather than per row.
+        
+        Each record carries a content hash; existing rows whose hash matches
+        are left alone and counted as neither inserted nor updated.
+        
+        Every row binds all of the table's columns. AirTable omits empty
+        fields from a record, so a missing field is written as NULL.
         """
         if not records:
             return 0, 0
             
+        columns = self.get_table_columns(table_name)
+        known_columns = set(columns)
+        statements = self._get_upsert_statements(table_name)
+        
         conn = self.get_connection()
         inserted = 0
         updated = 0
+        synced_at = datetime.now()
         
         try:
             with conn.cursor() as cursor:
-                for record in records:
-                    # Build the UPSERT query dynamically based on fields present
-                    columns = list(record.keys())
-                    columns.append('sync_status')
-                    columns.append('updated_at')
-                    
-                    values = list(record.values())
-                    values.append('synced')
-                    values.append(datetime.now())
+                for start in range(0, len(records), self.config.batch_size):
+                    batch = records[start:start + self.config.batch_size]
                     
-                    # Create placeholders for the SQL query
-                    placeholders = ','.join(['%s'] * len(values))
-                    columns_str = ','.join(columns)
-                    
-                    # Build the UPDATE clause for conflicts
-                    update_cols = [f"{col} = EXCLUDED.{col}" 
-                                 for col in columns 
-                                 if col != 'airtable_record_id']
-                    update_str = ','.join(update_cols)
-                    
-                    query = f"""
-                    INSERT INTO {self.config.postgres_schema}.{table_name} 
-                    ({columns_str})
-                    VALUES ({placeholders})
-                    ON CONFLICT (airtable_record_id) 
-                    DO UPDATE SET {update_str}
-                    RETURNING (xmax = 0) AS inserted
-                    """
-                    
-                    cursor.execute(query, values)
-                    result = cursor.fetchone()
+                    rows = []
+                    unknown = set()
+                    for record in batch:
+                        record = dict(record, content_hash=_content_hash(record))
+                        unknown.update(record.keys() - known_columns)
+                        rows.append(tuple(record.get(col) for col in columns))
+                        
+                    if unknown:
+                        logger.warning("Ignoring fields with no column in %s: %s",
+                                       table_name, ', '.join(sorted(unknown)))
+                        
+                    if self.config.sync_mode == "full":
+                        # A full load can always be replayed from AirTable, so
+                        # its batches needn't wait for the WAL flush. The sync
+                        # cursor's synchronous commit later makes them durable.
+                        cursor.execute("SET LOCAL synchronous_commit = off")
+                    cursor.execute(statements.create_staging)
+                    cursor.copy_expert(statements.copy, _to_copy_buffer(rows))
+                    cursor.execute(statements.merge, (synced_at,))
+                    batch_inserted, batch_updated = cursor.fetchone()
+                    cursor.execute(statements.drop_staging)
                     
-                    if result and result[0]:
-                        inserted += 1
-                    else:
-                        updated += 1
+                    inserted += batch_inserted
+                    updated += batch_updated
                         
-                conn.commit()
-                logger.info(f"Upserted {len(records)} records into {table_name}: "
-                          f"{inserted} inserted, {updated} updated")
+                    # Commit once per batch rather than once per record
+                    conn.commit()
+                    
+                logger.info("Upserted %d records into %s: %d inserted, %d updated",
+                            len(records), table_name, inserted, updated)
                           
         except Exception as e:
             conn.rollback()
-            logger.error(f"Error upserting records: {e}")
+            logger.error("Error upserting records: %s", e)
             raise
         finally:
             self.return_connection(conn)
@@ -348,23 +939,129 @@ class PostgreSQLSync:
         Retrieves the timestamp of the last successful sync for a table.
         
         This enables incremental synchronization by tracking when each table
-        was last updated. We store this in a separate sync_status table to
-        maintain a full audit trail of synchronization operations.
+        was last updated. We store this in a separate sync_state table rather
+        than deriving it from local write times, so the window matches the
+        changes AirTable has actually handed us.
         """
         conn = self.get_connection()
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 cursor.execute("""
-                    SELECT MAX(updated_at) as last_sync
-                    FROM {}.{}
-                    WHERE sync_status = 'synced'
-                """.format(self.config.postgres_schema, table_name))
+                    SELECT cursor as last_sync
+                    FROM {}.sync_state
+                    WHERE table_name = %s
+                """.format(self.config.postgres_schema), (table_name,))
                 
                 result = cursor.fetchone()
                 return result['last_sync'] if result and result['last_sync'] else None
                 
         finally:
             self.return_connection(conn)
+            
+    def advance_sync_cursor(self, table_name: str, cursor_time: datetime):
+        """
+        Records that all AirTable changes before cursor_time are loaded.
+        
+        The cursor only ever moves forward, so a late or repeated run can't
+        rewind the incremental window.
+        """
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO {}.sync_state (table_name, cursor, last_run)
+                    VALUES (%s, %s, now())
+                    ON CONFLICT (table_name) DO UPDATE SET
+                        cursor = GREATEST(sync_state.cursor, EXCLUDED.cursor),
+                        last_run = EXCLUDED.last_run
+                """.format(self.config.postgres_schema), (table_name, cursor_time))
+            conn.commit()
+        finally:
+            self.return_connection(conn)
+
+
+# Marks the end of a prefetched stream
+_END_OF_STREAM = object()
+
+
+def _prefetch(batches: Iterator[List[Dict]], depth: int = 2) -> Iterator[List[Dict]]:
+    """
+    Pulls batches from an iterator on a background thread.
+    
+    AirTable pagination is a serial chain of requests, so this lets the next
+    page download while the caller transforms and writes the current one.
+    The bounded queue is the backpressure: the producer runs at most depth
+    batches ahead. An exception raised by the producer is re-raised in the
+    caller when it reaches that point of the stream.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    
+    def put(item: Any) -> bool:
+        # Give up once the consumer has gone away rather than block forever
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(_END_OF_STREAM)
+    
+    threading.Thread(target=produce, name="airtable-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+# Tables each synced table references through foreign keys
+TABLE_DEPENDENCIES: Dict[str, set] = {
+    'customers': set(),
+    'commodities': set(),
+    'price_lists': {'commodities'},
+    'contracts_hp_ng': {'customers', 'commodities'},
+    'contracts_hp_ng___2': {'customers', 'commodities'},
+    'finished_goods': {'customers', 'commodities'},
+    'shipments': {'customers', 'commodities', 'contracts_hp_ng', 'contracts_hp_ng___2'},
+    'inventory_movements': {'customers', 'commodities', 'shipments'},
+}
+
+
+def _dependency_levels(dependencies: Dict[str, set]) -> List[List[str]]:
+    """
+    Groups tables into levels with Kahn's algorithm.
+    
+    Every table's dependencies sit in an earlier level, so the tables of one
+    level can be synced concurrently.
+    """
+    remaining = {table: set(deps) for table, deps in dependencies.items()}
+    levels = []
+    while remaining:
+        ready = sorted(table for table, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Circular table dependencies: {sorted(remaining)}")
+        levels.append(ready)
+        for table in ready:
+            del remaining[table]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
 
 
 class SyncOrchestrator:
@@ -376,11 +1073,78 @@ class SyncOrchestrator:
     the overall flow, error recovery, and monitoring of the sync process.
     """
     
+    # Upper bound on tables synced concurrently within a dependency level
+    SYNC_WORKERS = 8
+    
     def __init__(self, config: SyncConfig):
         self.config = config
         self.airtable = AirTableClient(config)
         self.postgres = PostgreSQLSync(config)
         
+    def resolve_table_fields(self):
+        """
+        Works out which AirTable fields each table actually needs.
+        
+        A field is requested only if it maps onto a column of the target
+        table, which cuts bytes on the wire and JSON parsing time for tables
+        with many unmapped fields. If the meta API isn't available (it needs
+        the schema.bases:read scope), tables are fetched with all fields.
+        
+        Any "Last modified time" field found along the way is used for the
+        table's incremental filter.
+        """
+        try:
+            table_fields = self.airtable.fetch_table_fields()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Could not read AirTable schema, fetching all fields: {e}")
+            return
+            
+        for table_name, fields in table_fields.items():
+            modified = [f['name'] for f in fields if f.get('type') == 'lastModifiedTime']
+            if modified:
+                self.airtable.last_modified_fields.setdefault(table_name, modified[0])
+                
+            if table_name in self.airtable.table_fields:
+                continue
+            names = [f['name'] for f in fields]
+            columns = set(self.postgres.get_table_columns(table_name))
+            wanted = [
+                name for name in names
+                if self.postgres.map_column_name(
+                    table_name, self.airtable._sanitize_column_name(name)) in columns
+            ]
+            if wanted:
+                self.airtable.table_fields[table_name] = wanted
+        
+    def get_modified_since(self, table_name: str) -> Optional[datetime]:
+        """
+        Determines the incremental sync window for a table.
+        
+        Returns None when a full sync is needed, either because full mode is
+        configured or because the table has never been synced.
+        """
+        last_sync = None
+        if self.config.sync_mode == "incremental":
+            last_sync = self.postgres.get_last_sync_time(table_name)
+            if last_sync:
+                logger.info(f"Performing incremental sync of {table_name} since {last_sync}")
+            else:
+                logger.info(f"No previous sync found for {table_name}, performing full sync")
+        return last_sync
+        
+    def fetch_changes(self, table_name: str,
+                      modified_since: Optional[datetime]) -> Tuple[datetime, Iterator[Dict]]:
+        """
+        Streams records changed since modified_since, along with the new cursor.
+        
+        The cursor is taken before the first request so that edits made in
+        AirTable while pages are being fetched fall into the next window
+        instead of being skipped.
+        """
+        cursor_time = datetime.now(timezone.utc)
+        records = self.airtable.iter_table_records(table_name, modified_since)
+        return cursor_time, records
+        
     def sync_table(self, table_name: str) -> Dict[str, Any]:
         """
         Synchronizes a single table from AirTable to PostgreSQL.
@@ -396,46 +1160,51 @@ class SyncOrchestrator:
         logger.info(f"Starting sync for table: {table_name}")
         start_time = datetime.now()
         
-        # Determine sync strategy
-        last_sync = None
-        if self.config.sync_mode == "incremental":
-            last_sync = self.postgres.get_last_sync_time(table_name)
-            if last_sync:
-                logger.info(f"Performing incremental sync since {last_sync}")
-            else:
-                logger.info("No previous sync found, performing full sync")
+        cursor_time, records = self.fetch_changes(
+            table_name, self.get_modified_since(table_name))
+        
+        # Records flow through in batches - fetch, transform, upsert, release -
+        # so memory stays bounded by the batch size rather than the table size.
+        # The next batch is fetched in the background while this one is written.
+        batches = _prefetch(iter(lambda: list(islice(records, self.config.batch_size)), []))
+        processed = inserted = updated = 0
+        while True:
+            # Fetch the next batch of records from AirTable
+            try:
+                batch = next(batches, [])
+            except Exception as e:
+                logger.error(f"Failed to fetch records from AirTable: {e}")
+                return {
+                    'status': 'failed',
+                    'error': str(e),
+                    'table': table_name
+                }
+            if not batch:
+                break
                 
-        # Fetch records from AirTable
-        try:
-            records = self.airtable.fetch_table_records(table_name, last_sync)
-        except Exception as e:
-            logger.error(f"Failed to fetch records from AirTable: {e}")
-            return {
-                'status': 'failed',
-                'error': str(e),
-                'table': table_name
-            }
+            # Transform records for PostgreSQL
+            transformed_records = self.airtable.transform_batch(batch, table_name)
             
-        # Transform records for PostgreSQL
-        transformed_records = []
-        for record in records:
-            transformed = self.airtable.transform_record(record, table_name)
-            transformed_records.append(transformed)
+            # Upsert records to PostgreSQL
+            batch_inserted, batch_updated = self.postgres.upsert_records(
+                table_name, transformed_records)
+            processed += len(batch)
+            inserted += batch_inserted
+            updated += batch_updated
             
-        # Upsert records to PostgreSQL
-        if transformed_records:
-            inserted, updated = self.postgres.upsert_records(table_name, transformed_records)
-        else:
-            inserted = updated = 0
+        if not processed:
             logger.info(f"No records to sync for {table_name}")
             
+        # Only advance the incremental window once the data is committed
+        self.postgres.advance_sync_cursor(table_name, cursor_time)
+            
         # Calculate sync metrics
         duration = (datetime.now() - start_time).total_seconds()
         
         return {
             'status': 'success',
             'table': table_name,
-            'records_processed': len(records),
+            'records_processed': processed,
             'inserted': inserted,
             'updated': updated,
             'duration_seconds': duration,
@@ -449,29 +1218,26 @@ class SyncOrchestrator:
         Order matters because of foreign key constraints. We sync tables
         that others depend on first (like customers and commodities),
         then tables with foreign keys, and finally junction tables.
+        
+        Tables are grouped into dependency levels; every table in a level
+        syncs in its own worker thread, since the work is dominated by
+        AirTable and PostgreSQL round-trips. We only wait between levels.
         """
-        # Define sync order based on dependencies
-        sync_order = [
-            'customers',      # No dependencies
-            'commodities',    # No dependencies  
-            'price_lists',    # Depends on commodities
-            'contracts_hp_ng',  # Depends on customers, commodities
-            'contracts_hp_ng___2',  # Depends on customers, commodities
-            'shipments',      # Depends on customers, contracts, commodities
-            'inventory_movements',  # Depends on multiple tables
-            'finished_goods'  # Depends on customers, commodities
-        ]
+        self.postgres.load_table_columns(list(TABLE_DEPENDENCIES))
+        self.resolve_table_fields()
         
         results = []
-        for table_name in sync_order:
-            result = self.sync_table(table_name)
-            results.append(result)
-            
-            # Stop if a table fails to sync
-            if result['status'] == 'failed':
-                logger.error(f"Stopping sync due to failure in {table_name}")
-                break
+        with ThreadPoolExecutor(max_workers=self.SYNC_WORKERS) as executor:
+            for level in _dependency_levels(TABLE_DEPENDENCIES):
+                level_results = list(executor.map(self.sync_table, level))
+                results.extend(level_results)
                 
+                # Stop if a table fails to sync
+                failed = [r['table'] for r in level_results if r['status'] == 'failed']
+                if failed:
+                    logger.error(f"Stopping sync due to failure in {', '.join(failed)}")
+                    break
+                    
         return results
     
     def generate_sync_report(self, results: List[Dict]) -> str:
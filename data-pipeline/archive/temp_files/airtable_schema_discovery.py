@@ -4,11 +4,182 @@
 # This script discovers all tables, fields, relationships, and data types programmatically
 
 import os
+import sys
 import json
+import hashlib
+import time
+import random
+import threading
+import multiprocessing
 import requests
-from typing import Dict, List, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from dataclasses import asdict, dataclass, field as dataclass_field
+from typing import Dict, Iterator, List, Any, Optional, TextIO, Tuple
 from datetime import datetime
 
+# orjson writes the schema JSON much faster than the stdlib and serializes
+# FieldInfo dataclasses natively; it is optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson lets an uncached meta response be parsed one table at a time instead
+# of materializing the whole body; it is optional as well
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Known tables from the documentation, sampled when the meta API is
+# unavailable
+KNOWN_TABLES = [
+    ("tbl7sHbwOCOTjL2MC", "Contracts (Hợp Đồng)"),
+    ("tbllz4cazITSwnXIo", "Contracts (Hợp Đồng) - 2"),
+    ("tblDUfIlNy07Z0hiL", "Customers"),
+    ("tblSj7JcxYYfs6Dcl", "Shipments"),
+    ("tblhb3Vxhi6Yt0BDw", "Inventory Movements"),
+    ("tblNY26FnHswHRcWS", "Finished Goods")
+]
+
+# Map AirTable types to PostgreSQL types
+# This mapping is crucial for maintaining data integrity during migration
+_TYPE_MAPPING: Dict[str, str] = {
+    'singleLineText': 'VARCHAR(255)',
+    'multilineText': 'TEXT',
+    'richText': 'TEXT',
+    'percent': 'DECIMAL(5,4)',  # Stores percentages as decimals
+    'currency': 'DECIMAL(15,2)',
+    'singleSelect': 'VARCHAR(100)',
+    'multipleSelects': 'TEXT[]',  # PostgreSQL array type
+    'date': 'DATE',
+    'dateTime': 'TIMESTAMP',
+    'checkbox': 'BOOLEAN',
+    'url': 'VARCHAR(2048)',
+    'email': 'VARCHAR(254)',
+    'phoneNumber': 'VARCHAR(50)',
+    'multipleRecordLinks': 'INTEGER[]',  # Will be foreign key references
+    'multipleLookupValues': 'JSONB',  # Complex type, store as JSON
+    'formula': 'TEXT',  # Computed field
+    'rollup': 'JSONB',
+    'count': 'INTEGER',
+    'autoNumber': 'SERIAL',
+    'barcode': 'VARCHAR(100)',
+    'rating': 'INTEGER',
+    'duration': 'INTERVAL'
+}
+
+# Columns every generated table starts with
+_BASE_COLUMN_LINES = (
+    "    id SERIAL PRIMARY KEY",
+    "    airtable_id VARCHAR(20) UNIQUE",  # Preserve original AirTable ID
+    "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+    "    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+)
+
+# Field types whose values AirTable computes
+_COMPUTED_TYPES = frozenset({'formula', 'rollup', 'count', 'multipleLookupValues'})
+
+# Sanitize names for PostgreSQL in one str.translate pass: spaces and
+# hyphens become underscores and parentheses are dropped. Column names keep
+# their hyphens and are lowercased.
+_TABLE_NAME_TRANS = str.maketrans({' ': '_', '-': '_', '(': None, ')': None})
+_COLUMN_NAME_TRANS = str.maketrans({' ': '_', '(': None, ')': None})
+
+
+@lru_cache(maxsize=4096)
+def _safe_table_name(name: str) -> str:
+    return name.translate(_TABLE_NAME_TRANS)
+
+
+@lru_cache(maxsize=4096)
+def _safe_column_name(name: str) -> str:
+    return name.translate(_COLUMN_NAME_TRANS).lower()
+
+
+def _infer_list_type(value: list) -> str:
+    # Could be array of foreign keys or multi-select
+    if value and isinstance(value[0], str) and value[0].startswith('rec'):
+        return 'INTEGER[]'  # Foreign key references
+    return 'TEXT[]'
+
+
+def _infer_str_type(value: str) -> str:
+    # Try to detect specific string types
+    if value.startswith('rec'):
+        return 'VARCHAR(20)'  # AirTable record ID
+    elif '@' in value:
+        return 'VARCHAR(254)'  # Email
+    elif len(value) > 255:
+        return 'TEXT'
+    elif value.count('-') == 2 and len(value) == 10:
+        return 'DATE'  # Date format
+    else:
+        return 'VARCHAR(255)'
+
+
+# Sampled values come from JSON, so their exact type picks the inference rule
+# in one lookup; keying on type() also keeps bool apart from int
+_VALUE_TYPE_DISPATCH = {
+    type(None): lambda value: 'TEXT',  # Default when we can't determine
+    bool: lambda value: 'BOOLEAN',
+    int: lambda value: 'INTEGER',
+    float: lambda value: 'DECIMAL(15,4)',
+    list: _infer_list_type,
+    str: _infer_str_type
+}
+
+
+@dataclass(slots=True)
+class FieldInfo:
+    """
+    A discovered field and the PostgreSQL type chosen for it. Fields found by
+    sampling records only know their name and inferred type.
+    """
+    name: str
+    postgres_type: str
+    id: Optional[str] = None
+    airtable_type: Optional[str] = None
+    description: str = ''
+    options: Dict = dataclass_field(default_factory=dict)
+    is_computed: bool = False
+    is_required: bool = False
+    inferred: bool = False
+
+
+class TokenBucket:
+    """
+    Token bucket that keeps requests under AirTable's 5 requests per second
+    per base. Once a penalty is triggered, AirTable blocks the base for 30
+    seconds, so it is cheaper to wait a fraction of a second up front.
+    """
+    
+    def __init__(self, rate: float = 5.0, capacity: float = 5.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
 class AirTableSchemaDiscovery:
     """
     Discovers and documents the complete schema of an AirTable base.
@@ -16,7 +187,28 @@ class AirTableSchemaDiscovery:
     data source tell us about its structure rather than hardcoding assumptions.
     """
     
-    def __init__(self, base_id: str, api_key: str):
+    # Rate-limit retries back off exponentially with jitter, up to this cap
+    MAX_RATE_LIMIT_RETRIES = 8
+    MAX_RETRY_DELAY = 600.0
+    
+    # AirTable's limit applies per base, so discoverers for the same base
+    # share one bucket
+    _limiters: Dict[str, TokenBucket] = {}
+    _limiters_lock = threading.Lock()
+    
+    # Successful responses are cached on disk so repeated runs during
+    # development don't spend API quota on a schema that rarely changes
+    CACHE_DIR = ".airtable_schema_cache"
+    CACHE_TTL = 86400
+    
+    # Bases with at least this many tables build their DDL in worker
+    # processes; below it, process start-up costs more than it saves
+    PARALLEL_SQL_MIN_TABLES = 50
+    
+    # Requests that hang are abandoned after this many seconds
+    REQUEST_TIMEOUT = 30.0
+    
+    def __init__(self, base_id: str, api_key: str, use_cache: bool = True):
         self.base_id = base_id
         self.api_key = api_key
         self.base_url = f"https://api.airtable.com/v0/{base_id}"
@@ -25,12 +217,136 @@ class AirTableSchemaDiscovery:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        # One session keeps the TLS connection alive across requests and is
+        # safe to share between the sampling threads
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Transient server errors are retried by urllib3; 429s are handled
+        # in _request_with_retry so the backoff can be jittered
+        adapter = HTTPAdapter(max_retries=Retry(
+            total=8,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            respect_retry_after_header=True,
+            allowed_methods=['GET']
+        ), pool_maxsize=len(KNOWN_TABLES))  # One kept-alive connection per sampler
+        self.session.mount('https://', adapter)
+        with self._limiters_lock:
+            self._limiter = self._limiters.setdefault(base_id, TokenBucket())
+        self.use_cache = use_cache
+        self._cache: Dict[str, Dict] = {}
+        self._field_type_cache: Dict[Tuple, Tuple[str, bool]] = {}
         self.schema = {
             "base_id": base_id,
             "discovered_at": datetime.now().isoformat(),
             "tables": {}
         }
     
+    def _request_with_retry(self, url: str, **kwargs) -> requests.Response:
+        """
+        GETs a URL, backing off when AirTable answers 429.
+        
+        A throttled request waits for Retry-After when AirTable sends it,
+        otherwise 0.5s doubling per attempt plus random jitter, so the
+        concurrent samplers don't all retry at the same moment.
+        """
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            self._limiter.acquire()
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT, **kwargs)
+            if response.status_code != 429 or attempt == self.MAX_RATE_LIMIT_RETRIES:
+                return response
+            
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                delay = 0.5 * 2 ** attempt + random.uniform(0, 0.5 * 2 ** attempt)
+            delay = min(delay, self.MAX_RETRY_DELAY)
+            print(f"    Rate limited by AirTable, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        return response
+    
+    def _get_json(self, url: str, params: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        """
+        Returns (status code, parsed body) for a GET, consulting the memory
+        and disk caches first. Only 200 responses are cached; a cache hit is
+        reported as status 200. An expired entry is revalidated with its
+        ETag, so an unchanged response costs a 304 without a body.
+        """
+        key = hashlib.sha256(
+            json.dumps([self.base_id, url, params], sort_keys=True).encode()
+        ).hexdigest()
+        cache_path = os.path.join(self.CACHE_DIR, f"{key}.json")
+        etag_path = os.path.join(self.CACHE_DIR, f"{key}.etag")
+        headers = {}
+        
+        if self.use_cache:
+            if key in self._cache:
+                return 200, self._cache[key]
+            try:
+                if time.time() - os.path.getmtime(cache_path) < self.CACHE_TTL:
+                    with open(cache_path) as f:
+                        self._cache[key] = json.load(f)
+                    return 200, self._cache[key]
+                with open(etag_path) as f:
+                    headers['If-None-Match'] = f.read()
+            except (OSError, ValueError):
+                pass  # Missing or unreadable entry, fetch it again
+        
+        response = self._request_with_retry(url, params=params, headers=headers)
+        if response.status_code == 304:
+            try:
+                with open(cache_path) as f:
+                    self._cache[key] = json.load(f)
+                os.utime(cache_path)  # Unchanged, so fresh for another TTL
+                return 200, self._cache[key]
+            except (OSError, ValueError):
+                response = self._request_with_retry(url, params=params)
+        if response.status_code != 200:
+            return response.status_code, None
+        
+        data = response.json()
+        self._cache[key] = data
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(data, f)
+        etag = response.headers.get('ETag')
+        if etag:
+            with open(etag_path, 'w') as f:
+                f.write(etag)
+        elif os.path.exists(etag_path):
+            os.remove(etag_path)
+        return 200, data
+    
+    def _stream_tables(self, url: str) -> Tuple[int, Optional[Iterator[Dict]]]:
+        """
+        Returns (status code, table iterator) for the meta tables endpoint,
+        parsing the response body incrementally with ijson.
+        """
+        response = self._request_with_retry(url, stream=True)
+        if response.status_code != 200:
+            response.close()
+            return response.status_code, None
+        
+        def tables() -> Iterator[Dict]:
+            with response:
+                response.raw.decode_content = True  # Let urllib3 gunzip
+                # use_float keeps numbers as float rather than Decimal, which
+                # neither json nor orjson can serialize
+                yield from ijson.items(response.raw, 'tables.item', use_float=True)
+        
+        return 200, tables()
+    
+    def close(self) -> None:
+        """Closes the pooled connections."""
+        self.session.close()
+    
+    def __enter__(self) -> 'AirTableSchemaDiscovery':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
     def discover_schema(self) -> Dict[str, Any]:
         """
         Main discovery method that orchestrates the schema extraction process.
@@ -41,27 +357,31 @@ class AirTableSchemaDiscovery:
         # Step 1: Get base metadata including all tables
         # The meta API endpoint provides the complete structure
         try:
-            response = requests.get(
-                f"https://api.airtable.com/v0/meta/bases/{self.base_id}/tables",
-                headers=self.headers
-            )
+            meta_url = f"https://api.airtable.com/v0/meta/bases/{self.base_id}/tables"
+            # A cached response has to be read whole, so streaming only
+            # applies when the cache is bypassed
+            if ijson is not None and not self.use_cache:
+                status, tables = self._stream_tables(meta_url)
+            else:
+                status, tables_data = self._get_json(meta_url)
+                tables = tables_data.get('tables', []) if status == 200 else None
             
-            if response.status_code == 200:
-                tables_data = response.json()
-                print(f"Found {len(tables_data.get('tables', []))} tables in the base")
-                
+            if status == 200:
                 # Process each table's schema
-                for table in tables_data.get('tables', []):
+                for table in tables:
                     self._process_table_schema(table)
+                print(f"Found {len(self.schema['tables'])} tables in the base")
                     
             else:
-                print(f"Warning: Meta API returned status {response.status_code}")
+                print(f"Warning: Meta API returned status {status}")
                 print("Falling back to manual discovery...")
                 self._manual_discovery()
                 
         except Exception as e:
             print(f"Error accessing meta API: {e}")
             print("Attempting manual discovery through data API...")
+            # A stream that fails partway has already added some tables
+            self.schema['tables'] = {}
             self._manual_discovery()
         
         return self.schema
@@ -99,7 +419,7 @@ class AirTableSchemaDiscovery:
                     'relationship_type': 'many-to-many'  # AirTable uses junction tables internally
                 })
     
-    def _analyze_field(self, field: Dict) -> Dict:
+    def _analyze_field(self, field: Dict) -> FieldInfo:
         """
         Analyzes individual field metadata to determine PostgreSQL data type.
         This is where we map AirTable's type system to PostgreSQL's type system.
@@ -107,46 +427,32 @@ class AirTableSchemaDiscovery:
         field_type = field.get('type')
         field_options = field.get('options', {})
         
-        # Map AirTable types to PostgreSQL types
-        # This mapping is crucial for maintaining data integrity during migration
-        type_mapping = {
-            'singleLineText': 'VARCHAR(255)',
-            'multilineText': 'TEXT',
-            'richText': 'TEXT',
-            'number': self._determine_number_type(field_options),
-            'percent': 'DECIMAL(5,4)',  # Stores percentages as decimals
-            'currency': 'DECIMAL(15,2)',
-            'singleSelect': 'VARCHAR(100)',
-            'multipleSelects': 'TEXT[]',  # PostgreSQL array type
-            'date': 'DATE',
-            'dateTime': 'TIMESTAMP',
-            'checkbox': 'BOOLEAN',
-            'url': 'VARCHAR(2048)',
-            'email': 'VARCHAR(254)',
-            'phoneNumber': 'VARCHAR(50)',
-            'multipleRecordLinks': 'INTEGER[]',  # Will be foreign key references
-            'multipleLookupValues': 'JSONB',  # Complex type, store as JSON
-            'formula': 'TEXT',  # Computed field
-            'rollup': 'JSONB',
-            'count': 'INTEGER',
-            'autoNumber': 'SERIAL',
-            'barcode': 'VARCHAR(100)',
-            'rating': 'INTEGER',
-            'duration': 'INTERVAL'
-        }
-        
-        postgres_type = type_mapping.get(field_type, 'TEXT')
+        # Fields sharing a type signature map to the same column type, so it
+        # is resolved once per signature. Only precision and sign affect the
+        # result ('number' fields); options are otherwise ignored.
+        signature = (field_type, field_options.get('precision', 0),
+                     field_options.get('negative', True))
+        resolved = self._field_type_cache.get(signature)
+        if resolved is None:
+            if field_type == 'number':
+                postgres_type = self._determine_number_type(field_options)
+            else:
+                postgres_type = _TYPE_MAPPING.get(field_type, 'TEXT')
+            resolved = self._field_type_cache.setdefault(
+                signature, (postgres_type, field_type in _COMPUTED_TYPES)
+            )
+        postgres_type, is_computed = resolved
         
-        return {
-            'id': field.get('id'),
-            'name': field.get('name'),
-            'airtable_type': field_type,
-            'postgres_type': postgres_type,
-            'description': field.get('description', ''),
-            'options': field_options,
-            'is_computed': field_type in ['formula', 'rollup', 'count', 'multipleLookupValues'],
-            'is_required': field_options.get('required', False)
-        }
+        return FieldInfo(
+            id=field.get('id'),
+            name=field.get('name'),
+            airtable_type=field_type,
+            postgres_type=postgres_type,
+            description=field.get('description', ''),
+            options=field_options,
+            is_computed=is_computed,
+            is_required=field_options.get('required', False)
+        )
     
     def _determine_number_type(self, options: Dict) -> str:
         """
@@ -168,42 +474,38 @@ class AirTableSchemaDiscovery:
         Fallback method for schema discovery when meta API is unavailable.
         This approach samples actual data to infer the schema structure.
         """
-        # List of known tables from the documentation you provided
-        known_tables = [
-            ("tbl7sHbwOCOTjL2MC", "Contracts (Hợp Đồng)"),
-            ("tbllz4cazITSwnXIo", "Contracts (Hợp Đồng) - 2"),
-            ("tblDUfIlNy07Z0hiL", "Customers"),
-            ("tblSj7JcxYYfs6Dcl", "Shipments"),
-            ("tblhb3Vxhi6Yt0BDw", "Inventory Movements"),
-            ("tblNY26FnHswHRcWS", "Finished Goods")
-        ]
         
-        for table_id, table_name in known_tables:
-            print(f"  Manually discovering: {table_name}")
-            self._discover_table_by_sampling(table_id, table_name)
+        # Each sample is an independent request, so they are issued
+        # concurrently; map() keeps the results in KNOWN_TABLES order
+        with ThreadPoolExecutor(max_workers=len(KNOWN_TABLES)) as executor:
+            sampled = executor.map(lambda table: self._discover_table_by_sampling(*table),
+                                   KNOWN_TABLES)
+            for (table_id, table_name), table_info in zip(KNOWN_TABLES, sampled):
+                if table_info is not None:
+                    self.schema['tables'][table_name] = table_info
     
-    def _discover_table_by_sampling(self, table_id: str, table_name: str) -> None:
+    def _discover_table_by_sampling(self, table_id: str, table_name: str) -> Optional[Dict]:
         """
         Discovers table schema by sampling actual records.
         This is less reliable than meta API but works as a fallback.
+        Returns the table's schema entry, or None if nothing could be sampled.
         """
+        print(f"  Manually discovering: {table_name}")
         try:
             # Fetch a few records to analyze structure
-            response = requests.get(
+            status, data = self._get_json(
                 f"{self.base_url}/{table_id}",
-                headers=self.headers,
                 params={"maxRecords": 3}
             )
             
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
                 records = data.get('records', [])
                 
                 if records:
                     # Analyze first record's fields
                     sample_fields = records[0].get('fields', {})
                     
-                    self.schema['tables'][table_name] = {
+                    table_info = {
                         'id': table_id,
                         'name': table_name,
                         'fields': {},
@@ -214,108 +516,90 @@ class AirTableSchemaDiscovery:
                     for field_name, field_value in sample_fields.items():
                         # Infer type from value
                         postgres_type = self._infer_type_from_value(field_value)
-                        self.schema['tables'][table_name]['fields'][field_name] = {
-                            'name': field_name,
-                            'postgres_type': postgres_type,
-                            'inferred': True
-                        }
+                        table_info['fields'][field_name] = FieldInfo(
+                            name=field_name,
+                            postgres_type=postgres_type,
+                            inferred=True
+                        )
+                    return table_info
                         
         except Exception as e:
             print(f"    Error sampling table {table_name}: {e}")
+        return None
     
     def _infer_type_from_value(self, value: Any) -> str:
         """
         Infers PostgreSQL data type from actual field values.
         This is our detective work - looking at the evidence to deduce the type.
         """
-        if value is None:
-            return 'TEXT'  # Default when we can't determine
-        elif isinstance(value, bool):
-            return 'BOOLEAN'
-        elif isinstance(value, int):
-            return 'INTEGER'
-        elif isinstance(value, float):
-            return 'DECIMAL(15,4)'
-        elif isinstance(value, list):
-            # Could be array of foreign keys or multi-select
-            if value and isinstance(value[0], str) and value[0].startswith('rec'):
-                return 'INTEGER[]'  # Foreign key references
-            return 'TEXT[]'
-        elif isinstance(value, str):
-            # Try to detect specific string types
-            if value.startswith('rec'):
-                return 'VARCHAR(20)'  # AirTable record ID
-            elif '@' in value:
-                return 'VARCHAR(254)'  # Email
-            elif len(value) > 255:
-                return 'TEXT'
-            elif value.count('-') == 2 and len(value) == 10:
-                return 'DATE'  # Date format
-            else:
-                return 'VARCHAR(255)'
-        else:
-            return 'JSONB'  # Complex types
+        infer = _VALUE_TYPE_DISPATCH.get(type(value))
+        return infer(value) if infer is not None else 'JSONB'  # Complex types
     
-    def generate_sql_schema(self) -> str:
+    def generate_sql_schema(self, out: TextIO) -> None:
         """
-        Generates PostgreSQL CREATE TABLE statements from discovered schema.
+        Writes PostgreSQL CREATE TABLE statements from discovered schema.
         This is where we translate our discoveries into actionable SQL.
+        Statements are written to out as they are generated, so the whole
+        script is never held in memory at once.
         """
-        sql_statements = []
-        sql_statements.append("-- PostgreSQL Schema for AirTable Base: " + self.base_id)
-        sql_statements.append("-- Generated: " + self.schema['discovered_at'])
-        sql_statements.append("")
+        out.write("-- PostgreSQL Schema for AirTable Base: " + self.base_id + "\n")
+        out.write("-- Generated: " + self.schema['discovered_at'] + "\n")
+        out.write("\n")
+        
+        # Each table's statements are independent of the others, so large
+        # bases generate them in parallel; map() preserves table order.
+        # save_schema calls this from a worker thread, so the workers are
+        # started by a forkserver rather than by forking this threaded process
+        tables = self.schema['tables'].items()
+        if len(tables) >= self.PARALLEL_SQL_MIN_TABLES:
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context('forkserver')) as executor:
+                table_sql = list(executor.map(_generate_table_sql, tables, chunksize=8))
+        else:
+            table_sql = [_generate_table_sql(table) for table in tables]
         
         # Create tables first (without foreign keys)
-        for table_name, table_info in self.schema['tables'].items():
-            sql = self._generate_create_table(table_name, table_info)
-            sql_statements.append(sql)
+        for create_sql, _ in table_sql:
+            out.write(create_sql + "\n")
         
         # Add foreign key constraints separately
         # This two-phase approach prevents circular dependency issues
-        for table_name, table_info in self.schema['tables'].items():
-            fk_statements = self._generate_foreign_keys(table_name, table_info)
-            sql_statements.extend(fk_statements)
-        
-        return '\n'.join(sql_statements)
+        for _, fk_statements in table_sql:
+            out.writelines(statement + "\n" for statement in fk_statements)
     
-    def _generate_create_table(self, table_name: str, table_info: Dict) -> str:
+    @staticmethod
+    def _generate_create_table(table_name: str, table_info: Dict) -> str:
         """
         Generates individual CREATE TABLE statement.
         Notice how we sanitize table names for PostgreSQL compatibility.
         """
         # Sanitize table name for PostgreSQL
-        safe_table_name = table_name.replace(' ', '_').replace('(', '').replace(')', '').replace('-', '_')
+        safe_table_name = _safe_table_name(table_name)
         
-        sql = f"CREATE TABLE IF NOT EXISTS {safe_table_name} (\n"
-        sql += "    id SERIAL PRIMARY KEY,\n"
-        sql += "    airtable_id VARCHAR(20) UNIQUE,\n"  # Preserve original AirTable ID
-        sql += "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,\n"
-        sql += "    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,\n"
+        # Add fields, skipping computed fields initially
+        field_lines = (
+            f"    {_safe_column_name(field_name)} {field_info.postgres_type}"
+            for field_name, field_info in table_info['fields'].items()
+            if not field_info.is_computed
+        )
         
-        # Add fields
-        for field_name, field_info in table_info['fields'].items():
-            if not field_info.get('is_computed', False):  # Skip computed fields initially
-                safe_field_name = field_name.replace(' ', '_').replace('(', '').replace(')', '').lower()
-                postgres_type = field_info.get('postgres_type', 'TEXT')
-                sql += f"    {safe_field_name} {postgres_type},\n"
-        
-        sql = sql.rstrip(',\n') + "\n);\n"
-        return sql
+        # Joining once avoids re-copying the statement for every column
+        body = ",\n".join(chain(_BASE_COLUMN_LINES, field_lines))
+        return f"CREATE TABLE IF NOT EXISTS {safe_table_name} (\n{body}\n);\n"
     
-    def _generate_foreign_keys(self, table_name: str, table_info: Dict) -> List[str]:
+    @staticmethod
+    def _generate_foreign_keys(table_name: str, table_info: Dict) -> List[str]:
         """
         Generates foreign key constraints for relationships.
         This maintains referential integrity in our PostgreSQL database.
         """
         statements = []
-        safe_table_name = table_name.replace(' ', '_').replace('(', '').replace(')', '').replace('-', '_')
+        safe_table_name = _safe_table_name(table_name)
         
         for relationship in table_info.get('relationships', []):
             # For many-to-many relationships, we need a junction table
             # This is a key architectural decision for maintaining data relationships
             field_name = relationship['field_name']
-            safe_field_name = field_name.replace(' ', '_').replace('(', '').replace(')', '').lower()
+            safe_field_name = _safe_column_name(field_name)
             
             junction_table = f"{safe_table_name}_{safe_field_name}_junction"
             
@@ -339,23 +623,46 @@ CREATE TABLE IF NOT EXISTS {junction_table} (
         """
         os.makedirs(output_dir, exist_ok=True)
         
-        # Save as JSON for programmatic use
         json_path = os.path.join(output_dir, "airtable_schema.json")
-        with open(json_path, 'w') as f:
-            json.dump(self.schema, f, indent=2)
-        print(f"Schema saved to {json_path}")
-        
-        # Save SQL DDL statements
         sql_path = os.path.join(output_dir, "postgresql_schema.sql")
-        with open(sql_path, 'w') as f:
-            f.write(self.generate_sql_schema())
-        print(f"SQL DDL saved to {sql_path}")
-        
-        # Generate documentation
         doc_path = os.path.join(output_dir, "schema_documentation.md")
+        
+        # The three files are independent, so they are rendered and written
+        # concurrently; result() re-raises any write error here
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(self._write_json, json_path),
+                executor.submit(self._write_sql, sql_path),
+                executor.submit(self._write_documentation, doc_path)
+            ]
+            for future in futures:
+                future.result()
+        
+        print(f"Schema saved to {json_path}")
+        print(f"SQL DDL saved to {sql_path}")
+        print(f"Documentation saved to {doc_path}")
+    
+    def _write_json(self, json_path: str) -> None:
+        """
+        Saves the schema as JSON for programmatic use. Fields are serialized
+        here, once, rather than being held as dicts throughout discovery.
+        """
+        if orjson is not None:
+            with open(json_path, 'wb') as f:
+                f.write(orjson.dumps(self.schema, option=orjson.OPT_INDENT_2))
+        else:
+            with open(json_path, 'w') as f:
+                json.dump(self.schema, f, indent=2, default=asdict)
+    
+    def _write_sql(self, sql_path: str) -> None:
+        """Saves the PostgreSQL DDL statements."""
+        with open(sql_path, 'w') as f:
+            self.generate_sql_schema(f)
+    
+    def _write_documentation(self, doc_path: str) -> None:
+        """Saves the Markdown documentation."""
         with open(doc_path, 'w') as f:
             f.write(self._generate_documentation())
-        print(f"Documentation saved to {doc_path}")
     
     def _generate_documentation(self) -> str:
         """
@@ -376,13 +683,22 @@ CREATE TABLE IF NOT EXISTS {junction_table} (
             
             doc.append("\n#### Fields:")
             for field_name, field_info in table_info['fields'].items():
-                airtable_type = field_info.get('airtable_type', 'Unknown')
-                postgres_type = field_info.get('postgres_type', 'TEXT')
-                doc.append(f"- **{field_name}**: {airtable_type} → {postgres_type}")
+                airtable_type = field_info.airtable_type or 'Unknown'
+                doc.append(f"- **{field_name}**: {airtable_type} → {field_info.postgres_type}")
         
         return '\n'.join(doc)
 
 
+def _generate_table_sql(table: Tuple[str, Dict]) -> Tuple[str, List[str]]:
+    """
+    Generates one table's CREATE TABLE and junction table statements.
+    Module-level so it can be sent to worker processes.
+    """
+    table_name, table_info = table
+    return (AirTableSchemaDiscovery._generate_create_table(table_name, table_info),
+            AirTableSchemaDiscovery._generate_foreign_keys(table_name, table_info))
+
+
 def main():
     """
     Main execution function that orchestrates the schema discovery process.
@@ -396,14 +712,14 @@ def main():
         print("Please set it with: export AIRTABLE_API_KEY='your_key_here'")
         return
     
-    # Initialize discovery
-    discoverer = AirTableSchemaDiscovery(BASE_ID, API_KEY)
-    
-    # Discover schema
-    schema = discoverer.discover_schema()
-    
-    # Save results
-    discoverer.save_schema()
+    # Initialize discovery; --no-cache forces a fresh read of the schema
+    with AirTableSchemaDiscovery(BASE_ID, API_KEY,
+                                 use_cache="--no-cache" not in sys.argv[1:]) as discoverer:
+        # Discover schema
+        schema = discoverer.discover_schema()
+        
+        # Save results
+        discoverer.save_schema()
     
     # Print summary
     print(f"\nDiscovery complete!")
@@ -2,12 +2,63 @@
 # data-pipeline/airtable_sync_fixed.py
 # Fixed version of the synchronization script that handles complex field types
 
-import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from typing import Any
 
 # Import the original sync module
-from airtable_sync import *
+from airtable_sync import (
+    AirTableClient, FastJson, PostgreSQLSync, SyncConfig, SyncOrchestrator, logger,
+    _SKIP_FIELD, _handle_str, _passthrough
+)
+
+
+def _handle_list(value: list) -> Any:
+    """
+    Lists may hold record IDs, attachment objects, or plain values.
+    """
+    # Check if this is a list of record IDs (relationship field)
+    if value and isinstance(value[0], str) and value[0].startswith('rec'):
+        # This is a relationship field - skip it for now
+        # These will be handled in a separate junction table sync
+        return _SKIP_FIELD
+        
+    if value and isinstance(value[0], dict):
+        # This could be attachments or complex relationships
+        # For now, we'll store just the essential data
+        if 'id' in value[0]:
+            # Extract just the IDs if they exist
+            extracted_ids = [item.get('id') for item in value if 'id' in item]
+            if extracted_ids and extracted_ids[0].startswith('rec'):
+                # These are relationship IDs, skip them
+                return _SKIP_FIELD
+                
+        # For other complex lists (like attachments), store as JSON
+        # but try to extract the most relevant information
+        if 'url' in value[0]:
+            # This looks like attachment data - extract URLs
+            urls = [item.get('url') for item in value if 'url' in item]
+            return FastJson(urls) if urls else None
+            
+        # Store the whole structure as JSON for other complex types
+        return FastJson(value)
+        
+    # Simple list of values
+    return FastJson(value)
+
+
+def _handle_dict(value: dict) -> Any:
+    """
+    Single complex object (like a single attachment or formula result).
+    """
+    if value.get('specialValue') == 'NaN':
+        # NaN formula results carry no information
+        return None
+    if 'url' in value:
+        # Single attachment - store just the URL
+        return value.get('url')
+    # Store the whole dictionary as JSON
+    return FastJson(value)
+
 
 class FixedAirTableClient(AirTableClient):
     """
@@ -17,82 +68,24 @@ class FixedAirTableClient(AirTableClient):
     or complex objects instead of simple values. The commodities table, for instance,
     might have attachment fields (photos) or complex relationship fields that
     include metadata beyond just record IDs.
+    
+    The base transform_record drives the conversion; this client only swaps
+    in handlers that understand these richer list and dict shapes:
+    - Simple values (strings, numbers, booleans)
+    - Lists of record IDs (relationships)
+    - Lists of complex objects (attachments, complex relationships)
+    - Dictionary objects (single attachments, metadata)
     """
     
-    def transform_record(self, record: Dict, table_name: str) -> Dict:
-        """
-        Transforms an AirTable record into PostgreSQL-compatible format.
-        
-        This enhanced version handles various field types more robustly:
-        - Simple values (strings, numbers, booleans)
-        - Lists of record IDs (relationships)
-        - Lists of complex objects (attachments, complex relationships)
-        - Dictionary objects (single attachments, metadata)
-        """
-        transformed = {
-            'airtable_record_id': record['id'],
-            'last_airtable_modified': record.get('createdTime')
-        }
-        
-        fields = record.get('fields', {})
-        
-        for field_name, value in fields.items():
-            # Convert field name to PostgreSQL column name
-            pg_column = self._sanitize_column_name(field_name)
-            
-            # Handle different value types with more sophistication
-            if value is None:
-                transformed[pg_column] = None
-                
-            elif isinstance(value, list):
-                # Check if this is a list of record IDs (relationship field)
-                if value and isinstance(value[0], str) and value[0].startswith('rec'):
-                    # This is a relationship field - skip it for now
-                    # These will be handled in a separate junction table sync
-                    continue
-                    
-                elif value and isinstance(value[0], dict):
-                    # This could be attachments or complex relationships
-                    # For now, we'll store just the essential data
-                    if 'id' in value[0]:
-                        # Extract just the IDs if they exist
-                        extracted_ids = [item.get('id') for item in value if 'id' in item]
-                        if extracted_ids and extracted_ids[0].startswith('rec'):
-                            # These are relationship IDs, skip them
-                            continue
-                    
-                    # For other complex lists (like attachments), store as JSON
-                    # but try to extract the most relevant information
-                    if 'url' in value[0]:
-                        # This looks like attachment data - extract URLs
-                        urls = [item.get('url') for item in value if 'url' in item]
-                        transformed[pg_column] = Json(urls) if urls else None
-                    else:
-                        # Store the whole structure as JSON for other complex types
-                        transformed[pg_column] = Json(value)
-                else:
-                    # Simple list of values
-                    transformed[pg_column] = Json(value)
-                    
-            elif isinstance(value, dict):
-                # Single complex object (like a single attachment or formula result)
-                # Store as JSON but try to extract key information if possible
-                if 'url' in value:
-                    # Single attachment - store just the URL
-                    transformed[pg_column] = value.get('url')
-                else:
-                    # Store the whole dictionary as JSON
-                    transformed[pg_column] = Json(value)
-                    
-            elif isinstance(value, (int, float, str, bool)):
-                # Simple scalar values
-                transformed[pg_column] = value
-                
-            else:
-                # Fallback for any other type - store as JSON
-                transformed[pg_column] = Json(value)
-                
-        return transformed
+    _value_handlers = {
+        str: _handle_str,
+        int: _passthrough,
+        float: _passthrough,
+        bool: _passthrough,
+        type(None): _passthrough,
+        list: _handle_list,
+        dict: _handle_dict,
+    }
 
 # Patch the original orchestrator to use our fixed client
 class FixedSyncOrchestrator(SyncOrchestrator):
@@ -3,12 +3,15 @@
 # This script creates the final docker-compose.yml with proper formatting and comments
 # It includes safety features like automatic backup before overwriting
 
-import yaml
+import os
 import json
 import shutil
 from datetime import datetime
 from pathlib import Path
 
+# Older backups beyond this many are deleted
+BACKUPS_TO_KEEP = 5
+
 def create_docker_compose():
     """Create a properly formatted docker-compose.yml with comments"""
     
@@ -17,22 +20,30 @@ def create_docker_compose():
     if docker_compose_path.exists():
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_name = f'docker-compose.yml.backup.{timestamp}'
-        shutil.copy2('docker-compose.yml', backup_name)
+        # A hard link backs the file up without copying it; fall back to a
+        # copy when the link can't be made (e.g. unsupported filesystem)
+        try:
+            os.link('docker-compose.yml', backup_name)
+        except OSError:
+            shutil.copy2('docker-compose.yml', backup_name)
         print(f"Created backup: {backup_name}")
         print(f"Backup size: {Path(backup_name).stat().st_size} bytes")
+        
+        # Timestamped names sort chronologically, so keep the newest few
+        for old_backup in sorted(Path('.').glob('docker-compose.yml.backup.*'))[:-BACKUPS_TO_KEEP]:
+            old_backup.unlink()
+            print(f"Removed old backup: {old_backup}")
     else:
         print("No existing docker-compose.yml found, creating new file")
     
-    # Read the reconstructed configuration to verify it exists
+    # The reconstructed configuration must exist, but its contents are not
+    # needed: the final file below is written from a fixed template
     reconstructed_path = Path('docker-compose-reconstructed.yml')
-    if not reconstructed_path.exists():
+    if not reconstructed_path.is_file():
         print("ERROR: docker-compose-reconstructed.yml not found!")
         print("Please run reconstruct_docker_compose.py first")
         return False
     
-    with open('docker-compose-reconstructed.yml', 'r') as f:
-        config = yaml.safe_load(f)
-    
     # Create the final docker-compose.yml with proper formatting
     compose_content = '''# File path: ~/code/ltphongssvn/ac215e115groupproject/docker-compose.yml
 # Docker Compose configuration for Rice Market AI System local development
@@ -156,9 +167,11 @@ networks:
     # can communicate using their service names as hostnames
 '''
     
-    # Write the final docker-compose.yml
-    with open('docker-compose.yml', 'w') as f:
+    # Write the final docker-compose.yml to a new file and swap it in;
+    # writing in place would also overwrite the hard-linked backup
+    with open('docker-compose.yml.tmp', 'w') as f:
         f.write(compose_content)
+    os.replace('docker-compose.yml.tmp', 'docker-compose.yml')
     
     print("\nSuccessfully created docker-compose.yml")
     print(f"New file size: {Path('docker-compose.yml').stat().st_size} bytes")
@@ -5,8 +5,225 @@
 
 import json
 import os
+import re
+import sys
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Any, Mapping, Optional, TextIO, Tuple
+
+# orjson reads and writes the schema JSON much faster than the stdlib; it is
+# optional and we fall back to json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Characters AirTable names use that PostgreSQL identifiers can't
+_IDENTIFIER_TRANSLATION = str.maketrans({
+    ' ': '_', '-': '_', '.': '_', '/': '_', '%': 'pct', '(': None, ')': None
+})
+_NON_WORD_CHARS = re.compile(r'\W')
+
+# (name tokens, referenced table) in priority order, e.g. a field mentioning
+# both a customer and a contract references customers
+_REFERENCE_RULES = (
+    (('customer',), 'customers'),
+    (('commodity',), 'commodities'),
+    (('shipment',), 'shipments'),
+    (('contract', '2'), 'contracts_hp_ng_2'),
+    (('contract',), 'contracts_hp_ng'),
+    (('inventory',), 'inventory_movements'),
+    (('finished',), 'finished_goods'),
+    (('price', 'list'), 'price_lists')  # Assuming this table exists
+)
+
+# The rules compiled into one pattern. Each alternative is a set of
+# lookaheads tried from the start of the name, so the regex engine applies
+# the rules in priority order (rather than leftmost occurrence) in a single
+# match call; the named empty group reports which rule matched.
+_REFERENCE_RE = re.compile('|'.join(
+    ''.join(f'(?=.*?{re.escape(token)})' for token in tokens) + f'(?P<{table}>)'
+    for tokens, table in _REFERENCE_RULES
+), re.DOTALL)
+
+# Complete field structure based on the API documentation. This is our "truth
+# source" for what the complete schema should look like: each field maps to
+# (PostgreSQL type, is_relationship). It is a read-only constant, evaluated
+# once at import.
+_COMPLETE_FIELDS: Mapping[str, Mapping[str, Tuple[str, bool]]] = MappingProxyType({
+    "Contracts (Hợp Đồng)": {
+        "Contract Date": ("DATE", False),  # (PostgreSQL type, is_relationship)
+        "Contract Number": ("VARCHAR(50)", False),
+        "Customer": ("INTEGER", True),  # Foreign key to Customers
+        "Quantity (kg)": ("INTEGER", False),
+        "Entry Date": ("DATE", False),
+        "Voucher Number": ("VARCHAR(50)", False),
+        "Commodity Type": ("INTEGER", True),  # Foreign key to Commodities
+        "Unit Price": ("DECIMAL(10,2)", False),
+        "Transport Cost": ("DECIMAL(10,2)", False),
+        "Total Price (incl. Transport)": ("DECIMAL(10,2)", False),
+        "Received Quantity": ("INTEGER", False),
+        "Quantity Received at DN": ("INTEGER", False),
+        "Loss": ("INTEGER", False),
+        "Total Amount": ("DECIMAL(15,2)", False),
+        "Protein": ("DECIMAL(5,2)", False),
+        "Ash": ("DECIMAL(5,2)", False),
+        "Fibre": ("DECIMAL(5,2)", False),
+        "Fat": ("DECIMAL(5,2)", False),
+        "Moisture": ("DECIMAL(5,2)", False),
+        "Starch": ("DECIMAL(5,2)", False),
+        "Acid Value": ("DECIMAL(5,2)", False),
+        "Notes": ("TEXT", False),
+        "Related Shipments": ("INTEGER[]", True),
+        "Related Inventory Movements": ("INTEGER[]", True),
+        "Price Lists": ("INTEGER[]", True)
+    },
+    "Contracts (Hợp Đồng) - 2": {
+        "Contract Date": ("DATE", False),
+        "Contract Number": ("VARCHAR(50)", False),
+        "Customer": ("INTEGER", True),
+        "Quantity (kg)": ("INTEGER", False),
+        "Receipt Date": ("VARCHAR(50)", False),  # Keeping as VARCHAR since it might have Excel serial
+        "Receipt Number": ("VARCHAR(50)", False),
+        "Commodity Type": ("INTEGER", True),
+        "Unit Price": ("DECIMAL(10,2)", False),
+        "Logistics Cost (VC)": ("INTEGER", False),
+        "Total Price (with VC)": ("DECIMAL(10,2)", False),
+        "Received Quantity": ("INTEGER", False),
+        "Imported Quantity (ĐN)": ("INTEGER", False),
+        "Loss": ("INTEGER", False),
+        "Total Value": ("DECIMAL(15,2)", False),
+        "Protein (%)": ("DECIMAL(5,3)", False),
+        "Ash (%)": ("DECIMAL(5,3)", False),
+        "Fibre (%)": ("DECIMAL(5,3)", False),
+        "Fat (%)": ("DECIMAL(5,3)", False),
+        "Moisture (%)": ("DECIMAL(5,3)", False),
+        "Starch (%)": ("DECIMAL(5,3)", False),
+        "Acid Value (%)": ("DECIMAL(5,3)", False),
+        "Notes": ("TEXT", False),
+        "Related Inventory Movements": ("INTEGER[]", True)
+    },
+    "Customers": {
+        "Customer Name": ("VARCHAR(255)", False),
+        "National ID (CCCD)": ("VARCHAR(20)", False),
+        "Address": ("TEXT", False),
+        "Contracts": ("INTEGER[]", True),
+        "Shipments": ("INTEGER[]", True),
+        "Inventory Movements": ("INTEGER[]", True),
+        "Finished Goods": ("INTEGER[]", True),
+        "Contracts (Hợp Đồng) - 2": ("INTEGER[]", True)
+    },
+    "Shipments": {
+        "Shipment Date": ("DATE", False),
+        "Customer": ("INTEGER", True),
+        "Contract Number": ("INTEGER", True),
+        "Commodity Type": ("INTEGER", True),
+        "Vehicle/Container Number": ("VARCHAR(50)", False),
+        "Contract Quantity": ("INTEGER", False),
+        "Delivered Quantity (kg)": ("INTEGER", False),
+        "Arrival Time": ("VARCHAR(50)", False),
+        "Unloading Date": ("VARCHAR(50)", False),
+        "Inventory Movements": ("INTEGER[]", True),
+        "Contracts (Hợp Đồng) - 2": ("INTEGER[]", True)
+    },
+    "Inventory Movements": {
+        "Date": ("DATE", False),
+        "Batch/Note": ("VARCHAR(255)", False),
+        "Customer": ("INTEGER", True),
+        "Vehicle/Container": ("VARCHAR(50)", False),
+        "LDH/KH": ("VARCHAR(50)", False),
+        "Commodity Type": ("INTEGER", True),
+        "Opening Balance (Tons)": ("DECIMAL(10,2)", False),
+        "Quantity Received (Tons)": ("DECIMAL(10,2)", False),
+        "Internal Transfer Out (Tons)": ("DECIMAL(10,2)", False),
+        "Recovered Finished Goods In (Tons)": ("DECIMAL(10,2)", False),
+        "Domestic Sales Out (Tons)": ("DECIMAL(10,2)", False),
+        "Production Out (Tons)": ("DECIMAL(10,2)", False),
+        "Loss 1.3% (from 1/6/2025)": ("DECIMAL(10,2)", False),
+        "Raw Material Sales Out (Tons)": ("DECIMAL(10,2)", False),
+        "Closing Balance (Tons)": ("DECIMAL(10,2)", False),
+        "Fat (%)": ("DECIMAL(5,2)", False),
+        "Moisture (%)": ("DECIMAL(5,2)", False),
+        "Starch": ("DECIMAL(5,2)", False),
+        "Acid Value": ("DECIMAL(5,2)", False),
+        "Related Contract": ("INTEGER", True),
+        "Related Shipment": ("INTEGER", True),
+        "Contracts (Hợp Đồng) - 2": ("INTEGER[]", True)
+    },
+    "Finished Goods": {
+        "Ngày nhập": ("VARCHAR(50)", False),
+        "Khách hàng": ("INTEGER", True),
+        "LDH": ("VARCHAR(50)", False),
+        "Máy": ("VARCHAR(50)", False),
+        "Sản xuất tổng giờ": ("INTEGER", False),
+        "16h30-19h": ("INTEGER", False),
+        "19h-7h": ("INTEGER", False),
+        "Mì": ("VARCHAR(50)", False),
+        "Số lượng container": ("INTEGER", False),
+        "Số lượng theo đầu bao - Trong giờ": ("DECIMAL(10,2)", False),
+        "Số lượng theo đầu bao - Ngoài giờ": ("DECIMAL(10,2)", False),
+        "Tiền bồi dưỡng BX CONT (50K/20T, 100K/40T)": ("DECIMAL(10,2)", False),
+        "Tiền BX trong giờ (23K)": ("DECIMAL(10,2)", False),
+        "Ngoài giờ": ("DECIMAL(10,2)", False),
+        "Tổng (ca 1)": ("DECIMAL(10,2)", False),
+        "Số lượng container (ca 2)": ("INTEGER", False),
+        "Số lượng theo đầu bao - Trong giờ (ca 2)": ("DECIMAL(10,2)", False),
+        "Số lượng theo đầu bao - Ngoài giờ (ca 2)": ("DECIMAL(10,2)", False),
+        "Tiền bồi dưỡng BX CONT (ca 2)": ("DECIMAL(10,2)", False),
+        "Tiền BX trong giờ (ca 2)": ("DECIMAL(10,2)", False),
+        "Ngoài giờ (ca 2)": ("DECIMAL(10,2)", False)
+    }
+})
+
+
+def _build_complete_field_dicts(complete_fields: Mapping) -> Mapping[str, Dict[str, Dict]]:
+    """
+    Expands the documented fields into the schema entries enhance_schema
+    copies in, so they are built once at import rather than per field.
+    """
+    return MappingProxyType({
+        table_name: {
+            field_name: {
+                'name': field_name,
+                'postgres_type': pg_type,
+                'is_relationship': is_relationship,
+                'source': 'documentation'  # Mark that this came from docs
+            }
+            for field_name, (pg_type, is_relationship) in fields.items()
+        }
+        for table_name, fields in complete_fields.items()
+    })
+
+
+_COMPLETE_FIELD_DICTS = _build_complete_field_dicts(_COMPLETE_FIELDS)
+
+
+# The commodities lookup table every schema starts with (referenced by many
+# tables); it never varies, so it is rendered once here
+_COMMODITIES_DDL = """-- Lookup table for commodity types (referenced by multiple tables)
+CREATE TABLE IF NOT EXISTS commodities (
+    id SERIAL PRIMARY KEY,
+    airtable_id VARCHAR(20) UNIQUE,
+    name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _intern_schema_keys(schema: Dict) -> None:
+    """
+    Interns the field names and field attribute keys of a schema loaded from
+    JSON, in place. Keys written in this module are interned by the compiler,
+    so lookups against interned keys from the file resolve by identity.
+    """
+    intern = sys.intern
+    for table_info in schema.get('tables', {}).values():
+        table_info['fields'] = {
+            intern(field_name): {intern(key): value for key, value in field_info.items()}
+            for field_name, field_info in table_info['fields'].items()
+        }
+
 
 class EnhancedSchemaBuilder:
     """
@@ -18,154 +235,48 @@ class EnhancedSchemaBuilder:
     
     def __init__(self, discovered_schema_path: str = "schema/airtable_schema.json"):
         """
-        Initializes the builder by loading the discovered schema as our foundation.
+        Initializes the builder on the discovered schema as our foundation.
         We'll build upon what we already discovered rather than starting from scratch.
+        
+        The discovered schema is only read when first needed, so a run that
+        finds its outputs up to date never parses it.
         """
-        with open(discovered_schema_path, 'r') as f:
-            self.base_schema = json.load(f)
+        self.discovered_schema_path = discovered_schema_path
+        self._base_schema = None
         
         # This is the complete field mapping from the API documentation
         # I'm defining this based on what we saw in your AirTable API docs
-        self.complete_fields = self._define_complete_fields()
+        self.complete_fields = _COMPLETE_FIELD_DICTS
         
-    def _define_complete_fields(self) -> Dict:
-        """
-        Defines the complete field structure based on the API documentation.
-        This is our "truth source" for what the complete schema should look like.
-        
-        Notice how each field has specific metadata about its type and purpose.
-        This helps us create appropriate PostgreSQL columns with the right constraints.
-        """
-        return {
-            "Contracts (Hợp Đồng)": {
-                "Contract Date": ("DATE", False),  # (PostgreSQL type, is_relationship)
-                "Contract Number": ("VARCHAR(50)", False),
-                "Customer": ("INTEGER", True),  # Foreign key to Customers
-                "Quantity (kg)": ("INTEGER", False),
-                "Entry Date": ("DATE", False),
-                "Voucher Number": ("VARCHAR(50)", False),
-                "Commodity Type": ("INTEGER", True),  # Foreign key to Commodities
-                "Unit Price": ("DECIMAL(10,2)", False),
-                "Transport Cost": ("DECIMAL(10,2)", False),
-                "Total Price (incl. Transport)": ("DECIMAL(10,2)", False),
-                "Received Quantity": ("INTEGER", False),
-                "Quantity Received at DN": ("INTEGER", False),
-                "Loss": ("INTEGER", False),
-                "Total Amount": ("DECIMAL(15,2)", False),
-                "Protein": ("DECIMAL(5,2)", False),
-                "Ash": ("DECIMAL(5,2)", False),
-                "Fibre": ("DECIMAL(5,2)", False),
-                "Fat": ("DECIMAL(5,2)", False),
-                "Moisture": ("DECIMAL(5,2)", False),
-                "Starch": ("DECIMAL(5,2)", False),
-                "Acid Value": ("DECIMAL(5,2)", False),
-                "Notes": ("TEXT", False),
-                "Related Shipments": ("INTEGER[]", True),
-                "Related Inventory Movements": ("INTEGER[]", True),
-                "Price Lists": ("INTEGER[]", True)
-            },
-            "Contracts (Hợp Đồng) - 2": {
-                "Contract Date": ("DATE", False),
-                "Contract Number": ("VARCHAR(50)", False),
-                "Customer": ("INTEGER", True),
-                "Quantity (kg)": ("INTEGER", False),
-                "Receipt Date": ("VARCHAR(50)", False),  # Keeping as VARCHAR since it might have Excel serial
-                "Receipt Number": ("VARCHAR(50)", False),
-                "Commodity Type": ("INTEGER", True),
-                "Unit Price": ("DECIMAL(10,2)", False),
-                "Logistics Cost (VC)": ("INTEGER", False),
-                "Total Price (with VC)": ("DECIMAL(10,2)", False),
-                "Received Quantity": ("INTEGER", False),
-                "Imported Quantity (ĐN)": ("INTEGER", False),
-                "Loss": ("INTEGER", False),
-                "Total Value": ("DECIMAL(15,2)", False),
-                "Protein (%)": ("DECIMAL(5,3)", False),
-                "Ash (%)": ("DECIMAL(5,3)", False),
-                "Fibre (%)": ("DECIMAL(5,3)", False),
-                "Fat (%)": ("DECIMAL(5,3)", False),
-                "Moisture (%)": ("DECIMAL(5,3)", False),
-                "Starch (%)": ("DECIMAL(5,3)", False),
-                "Acid Value (%)": ("DECIMAL(5,3)", False),
-                "Notes": ("TEXT", False),
-                "Related Inventory Movements": ("INTEGER[]", True)
-            },
-            "Customers": {
-                "Customer Name": ("VARCHAR(255)", False),
-                "National ID (CCCD)": ("VARCHAR(20)", False),
-                "Address": ("TEXT", False),
-                "Contracts": ("INTEGER[]", True),
-                "Shipments": ("INTEGER[]", True),
-                "Inventory Movements": ("INTEGER[]", True),
-                "Finished Goods": ("INTEGER[]", True),
-                "Contracts (Hợp Đồng) - 2": ("INTEGER[]", True)
-            },
-            "Shipments": {
-                "Shipment Date": ("DATE", False),
-                "Customer": ("INTEGER", True),
-                "Contract Number": ("INTEGER", True),
-                "Commodity Type": ("INTEGER", True),
-                "Vehicle/Container Number": ("VARCHAR(50)", False),
-                "Contract Quantity": ("INTEGER", False),
-                "Delivered Quantity (kg)": ("INTEGER", False),
-                "Arrival Time": ("VARCHAR(50)", False),
-                "Unloading Date": ("VARCHAR(50)", False),
-                "Inventory Movements": ("INTEGER[]", True),
-                "Contracts (Hợp Đồng) - 2": ("INTEGER[]", True)
-            },
-            "Inventory Movements": {
-                "Date": ("DATE", False),
-                "Batch/Note": ("VARCHAR(255)", False),
-                "Customer": ("INTEGER", True),
-                "Vehicle/Container": ("VARCHAR(50)", False),
-                "LDH/KH": ("VARCHAR(50)", False),
-                "Commodity Type": ("INTEGER", True),
-                "Opening Balance (Tons)": ("DECIMAL(10,2)", False),
-                "Quantity Received (Tons)": ("DECIMAL(10,2)", False),
-                "Internal Transfer Out (Tons)": ("DECIMAL(10,2)", False),
-                "Recovered Finished Goods In (Tons)": ("DECIMAL(10,2)", False),
-                "Domestic Sales Out (Tons)": ("DECIMAL(10,2)", False),
-                "Production Out (Tons)": ("DECIMAL(10,2)", False),
-                "Loss 1.3% (from 1/6/2025)": ("DECIMAL(10,2)", False),
-                "Raw Material Sales Out (Tons)": ("DECIMAL(10,2)", False),
-                "Closing Balance (Tons)": ("DECIMAL(10,2)", False),
-                "Fat (%)": ("DECIMAL(5,2)", False),
-                "Moisture (%)": ("DECIMAL(5,2)", False),
-                "Starch": ("DECIMAL(5,2)", False),
-                "Acid Value": ("DECIMAL(5,2)", False),
-                "Related Contract": ("INTEGER", True),
-                "Related Shipment": ("INTEGER", True),
-                "Contracts (Hợp Đồng) - 2": ("INTEGER[]", True)
-            },
-            "Finished Goods": {
-                "Ngày nhập": ("VARCHAR(50)", False),
-                "Khách hàng": ("INTEGER", True),
-                "LDH": ("VARCHAR(50)", False),
-                "Máy": ("VARCHAR(50)", False),
-                "Sản xuất tổng giờ": ("INTEGER", False),
-                "16h30-19h": ("INTEGER", False),
-                "19h-7h": ("INTEGER", False),
-                "Mì": ("VARCHAR(50)", False),
-                "Số lượng container": ("INTEGER", False),
-                "Số lượng theo đầu bao - Trong giờ": ("DECIMAL(10,2)", False),
-                "Số lượng theo đầu bao - Ngoài giờ": ("DECIMAL(10,2)", False),
-                "Tiền bồi dưỡng BX CONT (50K/20T, 100K/40T)": ("DECIMAL(10,2)", False),
-                "Tiền BX trong giờ (23K)": ("DECIMAL(10,2)", False),
-                "Ngoài giờ": ("DECIMAL(10,2)", False),
-                "Tổng (ca 1)": ("DECIMAL(10,2)", False),
-                "Số lượng container (ca 2)": ("INTEGER", False),
-                "Số lượng theo đầu bao - Trong giờ (ca 2)": ("DECIMAL(10,2)", False),
-                "Số lượng theo đầu bao - Ngoài giờ (ca 2)": ("DECIMAL(10,2)", False),
-                "Tiền bồi dưỡng BX CONT (ca 2)": ("DECIMAL(10,2)", False),
-                "Tiền BX trong giờ (ca 2)": ("DECIMAL(10,2)", False),
-                "Ngoài giờ (ca 2)": ("DECIMAL(10,2)", False)
-            }
-        }
+        # enhance_schema() result, built on first use and shared by the
+        # JSON and SQL outputs
+        self._enhanced = None
         
+    @property
+    def base_schema(self) -> Dict:
+        """The discovered schema, loaded on first access."""
+        if self._base_schema is None:
+            if orjson is not None:
+                with open(self.discovered_schema_path, 'rb') as f:
+                    base_schema = orjson.loads(f.read())
+            else:
+                with open(self.discovered_schema_path, 'r') as f:
+                    base_schema = json.load(f)
+            _intern_schema_keys(base_schema)
+            self._base_schema = base_schema
+        return self._base_schema
+    
     def enhance_schema(self) -> Dict:
         """
         Enhances the discovered schema with complete field information.
         This is where we merge what we found with what we know should exist.
+        
+        The result is computed once and cached, so every caller receives the
+        same dict and must not modify it.
         """
+        if self._enhanced is not None:
+            return self._enhanced
+        
         enhanced = self.base_schema.copy()
         
         for table_name, table_info in enhanced['tables'].items():
@@ -173,18 +284,14 @@ class EnhancedSchemaBuilder:
                 # Keep existing discovered fields but add missing ones
                 complete_fields = self.complete_fields[table_name]
                 
-                # Add missing fields
-                for field_name, (pg_type, is_relationship) in complete_fields.items():
-                    if field_name not in table_info['fields']:
-                        table_info['fields'][field_name] = {
-                            'name': field_name,
-                            'postgres_type': pg_type,
-                            'is_relationship': is_relationship,
-                            'source': 'documentation'  # Mark that this came from docs
-                        }
+                # Add missing fields as copies of the documented entries
+                for field_name, template in complete_fields.items():
+                    existing = table_info['fields'].get(field_name)
+                    if existing is None:
+                        table_info['fields'][field_name] = template.copy()
                     else:
                         # Update existing field with relationship info
-                        table_info['fields'][field_name]['is_relationship'] = is_relationship
+                        existing['is_relationship'] = template['is_relationship']
                 
                 # Build relationships list
                 table_info['relationships'] = []
@@ -196,111 +303,133 @@ class EnhancedSchemaBuilder:
                         })
         
         enhanced['enhanced_at'] = datetime.now().isoformat()
+        self._enhanced = enhanced
         return enhanced
     
-    def generate_complete_sql(self) -> str:
+    def generate_complete_sql(self, timestamp: Optional[str] = None) -> str:
         """
         Generates comprehensive PostgreSQL DDL with all tables, fields, and relationships.
         This creates a production-ready schema that maintains referential integrity.
+        
+        timestamp goes into the Generated header; the current time is used
+        when it is not given.
+        """
+        return '\n'.join(self._iter_complete_sql(timestamp))
+    
+    def write_complete_sql(self, out: TextIO, timestamp: Optional[str] = None) -> None:
+        """
+        Writes the same DDL as generate_complete_sql to out one chunk at a
+        time, without building the whole script in memory first.
         """
+        chunks = self._iter_complete_sql(timestamp)
+        out.write(next(chunks))
+        for chunk in chunks:
+            out.write('\n')
+            out.write(chunk)
+    
+    def _iter_complete_sql(self, timestamp: Optional[str] = None) -> Iterator[str]:
+        """Yields the complete DDL in chunks, to be joined with newlines."""
         enhanced = self.enhance_schema()
-        sql = []
-        
-        # Header comments explaining the schema
-        sql.append("-- Complete PostgreSQL Schema for Rice Market AirTable Database")
-        sql.append(f"-- Generated: {datetime.now().isoformat()}")
-        sql.append("-- This schema includes both discovered and documented fields")
-        sql.append("")
         
-        # First, create a commodities lookup table (referenced by many tables)
-        sql.append("-- Lookup table for commodity types (referenced by multiple tables)")
-        sql.append("CREATE TABLE IF NOT EXISTS commodities (")
-        sql.append("    id SERIAL PRIMARY KEY,")
-        sql.append("    airtable_id VARCHAR(20) UNIQUE,")
-        sql.append("    name VARCHAR(100) NOT NULL,")
-        sql.append("    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-        sql.append(");")
-        sql.append("")
+        # Header comments explaining the schema, then the commodities lookup
+        # table (referenced by many tables)
+        yield "-- Complete PostgreSQL Schema for Rice Market AirTable Database"
+        yield f"-- Generated: {timestamp or datetime.now().isoformat()}"
+        yield "-- This schema includes both discovered and documented fields"
+        yield ""
+        yield _COMMODITIES_DDL
         
-        # Create main tables
+        # Create main tables. Junction tables are collected on the same pass
+        # and emitted after every main table exists.
+        junction_specs = []
         for table_name, table_info in enhanced['tables'].items():
-            safe_name = self._sanitize_name(table_name)
-            
-            sql.append(f"-- Table: {table_name}")
-            sql.append(f"CREATE TABLE IF NOT EXISTS {safe_name} (")
-            sql.append("    id SERIAL PRIMARY KEY,")
-            sql.append("    airtable_id VARCHAR(20) UNIQUE,")
-            
-            # Add all fields
-            for field_name, field_info in table_info['fields'].items():
-                if not field_info.get('is_relationship', False) or not field_info['postgres_type'].endswith('[]'):
-                    safe_field = self._sanitize_name(field_name)
-                    pg_type = field_info['postgres_type']
-                    
-                    # Add foreign key reference for single relationships
-                    if field_info.get('is_relationship', False):
-                        # Determine the referenced table
-                        ref_table = self._get_referenced_table(field_name)
-                        if ref_table:
-                            sql.append(f"    {safe_field} INTEGER REFERENCES {ref_table}(id),")
-                        else:
-                            sql.append(f"    {safe_field} {pg_type},")
-                    else:
-                        sql.append(f"    {safe_field} {pg_type},")
-            
-            sql.append("    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,")
-            sql.append("    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-            sql.append(");")
-            sql.append("")
-            
-            # Create indexes for foreign keys
-            for field_name, field_info in table_info['fields'].items():
-                if field_info.get('is_relationship', False) and not field_info['postgres_type'].endswith('[]'):
-                    safe_field = self._sanitize_name(field_name)
-                    sql.append(f"CREATE INDEX idx_{safe_name}_{safe_field} ON {safe_name}({safe_field});")
-            sql.append("")
+            fields = tuple(
+                (field_name, field_info['postgres_type'], field_info.get('is_relationship', False))
+                for field_name, field_info in table_info['fields'].items()
+            )
+            table_sql, table_junctions = self._render_table(table_name, fields)
+            yield table_sql
+            junction_specs.extend(table_junctions)
         
         # Create junction tables for many-to-many relationships
-        sql.append("-- Junction tables for many-to-many relationships")
-        for table_name, table_info in enhanced['tables'].items():
-            safe_table = self._sanitize_name(table_name)
+        yield "-- Junction tables for many-to-many relationships"
+        for safe_table, safe_field, target_table in junction_specs:
+            yield f"""CREATE TABLE IF NOT EXISTS {safe_table}_{safe_field}_junction (
+    {safe_table}_id INTEGER REFERENCES {safe_table}(id) ON DELETE CASCADE,
+    {target_table}_id INTEGER REFERENCES {target_table}(id) ON DELETE CASCADE,
+    PRIMARY KEY ({safe_table}_id, {target_table}_id)
+);
+"""
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _render_table(table_name: str, fields: Tuple[Tuple[str, str, bool], ...]) -> Tuple[str, Tuple]:
+        """
+        Renders one table's CREATE TABLE and foreign key indexes from its
+        (name, postgres type, is_relationship) fields, and returns them with
+        the table's (table, field, target) junction specs.
+        
+        The result depends only on the arguments, so it is cached: the
+        documented tables render to the same DDL every time they come up
+        with the same shape.
+        """
+        sanitize = EnhancedSchemaBuilder._sanitize_name
+        referenced_table = EnhancedSchemaBuilder._get_referenced_table
+        safe_name = sanitize(table_name)
+        column_lines = []
+        index_lines = []
+        junction_specs = []
+        add_column = column_lines.append
+        
+        for field_name, pg_type, relationship in fields:
+            safe_field = sanitize(field_name)
+            
+            if not relationship:
+                add_column(f"    {safe_field} {pg_type},\n")
+                continue
             
-            for rel in table_info.get('relationships', []):
-                if rel['type'] == 'many_to_many':
-                    field_name = rel['field_name']
-                    safe_field = self._sanitize_name(field_name)
-                    
-                    # Determine the target table
-                    target_table = self._get_referenced_table(field_name)
-                    if target_table:
-                        junction_name = f"{safe_table}_{safe_field}_junction"
-                        
-                        sql.append(f"CREATE TABLE IF NOT EXISTS {junction_name} (")
-                        sql.append(f"    {safe_table}_id INTEGER REFERENCES {safe_table}(id) ON DELETE CASCADE,")
-                        sql.append(f"    {target_table}_id INTEGER REFERENCES {target_table}(id) ON DELETE CASCADE,")
-                        sql.append(f"    PRIMARY KEY ({safe_table}_id, {target_table}_id)")
-                        sql.append(");")
-                        sql.append("")
+            # Determine the referenced table
+            ref_table = referenced_table(field_name)
+            if pg_type.endswith('[]'):
+                # Many-to-many relationships get a junction table instead
+                if ref_table:
+                    junction_specs.append((safe_name, safe_field, ref_table))
+                continue
+            
+            # Add foreign key reference for single relationships, and an
+            # index for the foreign key column
+            if ref_table:
+                add_column(f"    {safe_field} INTEGER REFERENCES {ref_table}(id),\n")
+            else:
+                add_column(f"    {safe_field} {pg_type},\n")
+            index_lines.append(f"CREATE INDEX idx_{safe_name}_{safe_field} ON {safe_name}({safe_field});\n")
         
-        return '\n'.join(sql)
+        columns = "".join(column_lines)
+        indexes = "".join(index_lines)
+        table_sql = f"""-- Table: {table_name}
+CREATE TABLE IF NOT EXISTS {safe_name} (
+    id SERIAL PRIMARY KEY,
+    airtable_id VARCHAR(20) UNIQUE,
+{columns}    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+{indexes}"""
+        return table_sql, tuple(junction_specs)
     
-    def _sanitize_name(self, name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _sanitize_name(name: str) -> str:
         """
         Converts AirTable field/table names to PostgreSQL-safe identifiers.
         PostgreSQL has strict rules about identifiers - no spaces, parentheses, etc.
+        Names repeat across the DDL passes, so results are cached.
         """
-        # Remove or replace problematic characters
-        safe = name.lower()
-        safe = safe.replace(' ', '_')
-        safe = safe.replace('(', '')
-        safe = safe.replace(')', '')
-        safe = safe.replace('-', '_')
-        safe = safe.replace('.', '_')
-        safe = safe.replace('%', 'pct')
-        safe = safe.replace('/', '_')
+        # Remove or replace problematic characters in one pass
+        safe = name.lower().translate(_IDENTIFIER_TRANSLATION)
         
         # Remove any remaining non-alphanumeric characters except underscore
-        safe = ''.join(c if c.isalnum() or c == '_' else '' for c in safe)
+        safe = _NON_WORD_CHARS.sub('', safe)
         
         # Ensure it doesn't start with a number
         if safe and safe[0].isdigit():
@@ -308,47 +437,67 @@ class EnhancedSchemaBuilder:
         
         return safe
     
-    def _get_referenced_table(self, field_name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_referenced_table(field_name: str) -> Optional[str]:
         """
         Determines which table a relationship field references based on the field name.
         This is pattern matching based on common naming conventions.
+        The first rule whose tokens all appear in the name wins.
         """
-        field_lower = field_name.lower()
-        
-        if 'customer' in field_lower:
-            return 'customers'
-        elif 'commodity' in field_lower:
-            return 'commodities'
-        elif 'shipment' in field_lower:
-            return 'shipments'
-        elif 'contract' in field_lower and '2' in field_lower:
-            return 'contracts_hp_ng_2'
-        elif 'contract' in field_lower:
-            return 'contracts_hp_ng'
-        elif 'inventory' in field_lower:
-            return 'inventory_movements'
-        elif 'finished' in field_lower:
-            return 'finished_goods'
-        elif 'price' in field_lower and 'list' in field_lower:
-            return 'price_lists'  # Assuming this table exists
-        
-        return None
+        match = _REFERENCE_RE.match(field_name.lower())
+        return match.lastgroup if match else None
     
-    def save_enhanced_schema(self):
+    def _outputs_up_to_date(self) -> bool:
+        """
+        Checks, as make does, whether both output files are newer than the
+        discovered schema and this script (which holds the documented fields).
+        """
+        try:
+            built = min(os.path.getmtime('schema/enhanced_airtable_schema.json'),
+                        os.path.getmtime('schema/complete_postgresql_schema.sql'))
+            sources = max(os.path.getmtime(self.discovered_schema_path),
+                          os.path.getmtime(__file__))
+        except OSError:
+            return False
+        return built > sources
+    
+    def save_enhanced_schema(self, pretty: bool = False, force: bool = False):
         """
         Saves the enhanced schema and SQL to files.
         This creates our final, production-ready schema definition.
+        
+        The JSON is read by scripts, so it is written compactly unless
+        pretty=True asks for an indented, human-readable file.
+        
+        Nothing is rebuilt when the saved files are newer than their sources,
+        unless force=True.
         """
-        # Save enhanced JSON schema
+        if not force and self._outputs_up_to_date():
+            print("Enhanced schema is up to date, skipping (use --force to rebuild)")
+            return
+        
+        # One timestamp for both files, so they record the same run
+        timestamp = datetime.now().isoformat()
+        
+        # Save enhanced JSON schema. The run's timestamp goes on a shallow
+        # copy, leaving the cached result untouched
         enhanced = self.enhance_schema()
-        with open('schema/enhanced_airtable_schema.json', 'w') as f:
-            json.dump(enhanced, f, indent=2)
+        saved = {**enhanced, 'enhanced_at': timestamp}
+        if orjson is not None:
+            with open('schema/enhanced_airtable_schema.json', 'wb') as f:
+                f.write(orjson.dumps(saved, option=orjson.OPT_INDENT_2 if pretty else None))
+        else:
+            with open('schema/enhanced_airtable_schema.json', 'w') as f:
+                if pretty:
+                    json.dump(saved, f, indent=2)
+                else:
+                    json.dump(saved, f, separators=(',', ':'))
         print("Enhanced schema saved to schema/enhanced_airtable_schema.json")
         
         # Save complete SQL
-        sql = self.generate_complete_sql()
-        with open('schema/complete_postgresql_schema.sql', 'w') as f:
-            f.write(sql)
+        with open('schema/complete_postgresql_schema.sql', 'w', buffering=1 << 20) as f:
+            self.write_complete_sql(f, timestamp)
         print("Complete SQL schema saved to schema/complete_postgresql_schema.sql")
         
         # Generate statistics
@@ -370,7 +519,7 @@ def main():
     print("Building enhanced schema with complete field definitions...")
     
     builder = EnhancedSchemaBuilder()
-    builder.save_enhanced_schema()
+    builder.save_enhanced_schema(force="--force" in sys.argv[1:])
     
     print("\nEnhanced schema building complete!")
     print("Next steps:")
@@ -7,6 +7,7 @@ Aligns all data to monthly frequency from July 2008 to December 2024
 
 import sys
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 from datetime import datetime
@@ -23,22 +24,48 @@ import market_drivers as md
 OUTPUT_DIR = Path(__file__).parent.parent / "data" / "processed"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+def _on_date_index(series: pd.Series, date_index: pd.DatetimeIndex) -> pd.Series:
+    """
+    Places a monthly series, which covers the date range position by position,
+    on date_index. A series already on that index is used as-is, no copy.
+    """
+    if series.index.equals(date_index):
+        return series
+    return pd.Series(series.to_numpy(copy=False), index=date_index)
+
 def main():
     """Extract and save all market factors to CSV."""
     logger.info("Starting market factors extraction...")
     
-    # Initialize results dataframe with monthly dates
-    date_range = pd.date_range(start='2008-07-01', end='2024-12-01', freq='MS')
-    df_market = pd.DataFrame({'Date': date_range})
+    # Monthly dates every factor is aligned to. Loaded columns are collected
+    # here and assembled into one DataFrame at the end, instead of inserting
+    # a column into it per factor.
+    date_index = pd.date_range(start='2008-07-01', end='2024-12-01', freq='MS')
+    columns = {}
     
     # Track successful loads
     loaded_factors = []
     
+    # The loaders are independent downloads, so they all run concurrently;
+    # each result is then processed in order below, and a failed loader only
+    # raises when its own result is read
+    loaders = {
+        'Oil': md.load_dubai_oman_oil,
+        'Inflation': md.load_inflation_avg,
+        'Population_Growth': md.load_population_growth,
+        'Population_Total': md.load_population_total,
+        'ENSO': md.load_nino34,
+        'Fertilizer': md.load_fertilizer
+    }
+    executor = ThreadPoolExecutor(max_workers=len(loaders))
+    futures = {name: executor.submit(loader) for name, loader in loaders.items()}
+    executor.shutdown(wait=False)
+    
     # 1. Load Oil prices
     try:
         logger.info("Loading oil prices...")
-        oil_series = md.load_dubai_oman_oil()
-        df_market['Oil_Dubai_Oman_USD_per_bbl'] = oil_series.values
+        oil_series = futures['Oil'].result()
+        columns['Oil_Dubai_Oman_USD_per_bbl'] = _on_date_index(oil_series, date_index)
         loaded_factors.append('Oil')
         logger.info(f"✓ Oil: {len(oil_series)} months")
     except Exception as e:
@@ -47,9 +74,9 @@ def main():
     # 2. Load Inflation
     try:
         logger.info("Loading inflation data...")
-        inflation_series = md.load_inflation_avg()
+        inflation_series = futures['Inflation'].result()
         # Align to our date range
-        df_market['Inflation_Asia_Avg_pct'] = inflation_series.reindex(df_market['Date']).values
+        columns['Inflation_Asia_Avg_pct'] = inflation_series.reindex(date_index)
         loaded_factors.append('Inflation')
         logger.info(f"✓ Inflation: {len(inflation_series)} months (interpolated from annual)")
     except Exception as e:
@@ -58,8 +85,8 @@ def main():
     # 3. Load Population Growth
     try:
         logger.info("Loading population growth data...")
-        pop_growth_series = md.load_population_growth()
-        df_market['Population_Growth_Asia_Avg_pct'] = pop_growth_series.reindex(df_market['Date']).values
+        pop_growth_series = futures['Population_Growth'].result()
+        columns['Population_Growth_Asia_Avg_pct'] = pop_growth_series.reindex(date_index)
         loaded_factors.append('Population_Growth')
         logger.info(f"✓ Population Growth: {len(pop_growth_series)} months (interpolated from annual)")
     except Exception as e:
@@ -68,10 +95,10 @@ def main():
     # 4. Load Population Total
     try:
         logger.info("Loading population total data...")
-        pop_total_series = md.load_population_total()
+        pop_total_series = futures['Population_Total'].result()
         # Convert to millions
         pop_total_series = pop_total_series / 1_000_000
-        df_market['Population_Total_Asia_Avg_millions'] = pop_total_series.reindex(df_market['Date']).values
+        columns['Population_Total_Asia_Avg_millions'] = pop_total_series.reindex(date_index)
         loaded_factors.append('Population_Total')
         logger.info(f"✓ Population Total: {len(pop_total_series)} months (interpolated from annual)")
     except Exception as e:
@@ -80,8 +107,8 @@ def main():
     # 5. Load ENSO
     try:
         logger.info("Loading ENSO data...")
-        enso_series = md.load_nino34()
-        df_market['ENSO_Nino34_Anomaly'] = enso_series.values
+        enso_series = futures['ENSO'].result()
+        columns['ENSO_Nino34_Anomaly'] = _on_date_index(enso_series, date_index)
         loaded_factors.append('ENSO')
         logger.info(f"✓ ENSO: {len(enso_series)} months")
     except Exception as e:
@@ -90,13 +117,15 @@ def main():
     # 6. Load Fertilizer
     try:
         logger.info("Loading fertilizer prices...")
-        fertilizer_series = md.load_fertilizer()
-        df_market['Fertilizer_Composite_USD_per_mt'] = fertilizer_series.values
+        fertilizer_series = futures['Fertilizer'].result()
+        columns['Fertilizer_Composite_USD_per_mt'] = _on_date_index(fertilizer_series, date_index)
         loaded_factors.append('Fertilizer')
         logger.info(f"✓ Fertilizer: {len(fertilizer_series)} months")
     except Exception as e:
         logger.error(f"Failed to load fertilizer data: {e}")
     
+    df_market = pd.DataFrame(columns, index=date_index).rename_axis('Date').reset_index()
+    
     # Save to CSV
     output_file = OUTPUT_DIR / f"market_factors_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     df_market.to_csv(output_file, index=False)
@@ -112,11 +141,10 @@ def main():
     
     # Data coverage summary
     logger.info("\nData Coverage:")
-    for col in df_market.columns:
-        if col != 'Date':
-            non_null = df_market[col].notna().sum()
-            coverage = non_null / len(df_market) * 100
-            logger.info(f"  {col}: {non_null}/{len(df_market)} ({coverage:.1f}%)")
+    non_null_counts = df_market.drop(columns='Date').notna().sum()
+    for col, non_null in non_null_counts.items():
+        coverage = non_null / len(df_market) * 100
+        logger.info(f"  {col}: {non_null}/{len(df_market)} ({coverage:.1f}%)")
     
     return df_market
 
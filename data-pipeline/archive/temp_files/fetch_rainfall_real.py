@@ -16,7 +16,40 @@ from pathlib import Path
 import logging
 from datetime import datetime
 import json
+import hashlib
 import time
+import warnings
+
+# SciPy's sparse matrices keep the region weight matrix small; it is
+# optional and we fall back to a dense NumPy array
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Numba compiles the box average into one loop over the cells; it is
+# optional and we fall back to the weight-matrix product
+try:
+    from numba import guvectorize
+except ImportError:
+    guvectorize = None
+
+if guvectorize is not None:
+    @guvectorize(['void(float32[:, :], float64[:], float64[:])',
+                  'void(float64[:, :], float64[:], float64[:])'],
+                 '(m,n),(m)->()', nopython=True, target='parallel')
+    def _weighted_nanmean_2d(data, weights, out):
+        """Mean of a (lat, lon) block, weighting each row, skipping NaN cells."""
+        total = 0.0
+        weight_sum = 0.0
+        for i in range(data.shape[0]):
+            for j in range(data.shape[1]):
+                if not np.isnan(data[i, j]):
+                    total += data[i, j] * weights[i]
+                    weight_sum += weights[i]
+        out[0] = total / weight_sum if weight_sum > 0 else np.nan
+else:
+    _weighted_nanmean_2d = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,12 +60,99 @@ OUTPUT_DIR = Path(__file__).parent.parent / "data" / "processed"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _add_asia_average(columns):
+    """
+    Add the Asian average of the regional rainfall columns (excluding NaN
+    values) and its anomaly from the long-term mean, in percent, to columns.
+    """
+    regional = np.vstack([values for name, values in columns.items() if 'rainfall' in name])
+    with warnings.catch_warnings():
+        # Months without any regional value average to NaN, quietly
+        warnings.simplefilter('ignore', RuntimeWarning)
+        asia_avg = np.nanmean(regional, axis=0, dtype=np.float64)
+        long_term_mean = np.nanmean(asia_avg)
+
+    columns['Asia_Avg_Rainfall_mm'] = asia_avg
+    columns['Rainfall_Anomaly_pct'] = (asia_avg - long_term_mean) / long_term_mean * 100
+
+
+def _regional_means(precip, boxes, lat_name='lat', lon_name='lon', lat_weighted=False):
+    """
+    Average precip over each [west, east, south, north] box for every time
+    step, skipping NaN cells, and return an array of shape (boxes, time).
+
+    Cells are weighted by cos(latitude) if lat_weighted. With Numba, each
+    box is reduced by a compiled kernel; otherwise all boxes are averaged
+    with one product against a (boxes, cells) matrix of cell weights. Either
+    way there is no separate xarray reduction per box.
+    """
+    lat = precip[lat_name].values
+    lon = precip[lon_name].values
+
+    # Only cells inside some box are needed
+    lat_idx = np.flatnonzero(np.any([(lat >= south) & (lat <= north) for _, _, south, north in boxes], axis=0))
+    lon_idx = np.flatnonzero(np.any([(lon >= west) & (lon <= east) for west, east, _, _ in boxes], axis=0))
+    precip = precip.isel({lat_name: lat_idx, lon_name: lon_idx}).transpose('time', lat_name, lon_name)
+    lat, lon = lat[lat_idx], lon[lon_idx]
+    cube = precip.values
+    cell_weights = np.cos(np.deg2rad(lat)) if lat_weighted else np.ones(len(lat))
+
+    # Each box's cells, as (lat, lon) index runs into the cropped grid
+    box_cells = [
+        (np.flatnonzero((lat >= south) & (lat <= north)), np.flatnonzero((lon >= west) & (lon <= east)))
+        for west, east, south, north in boxes
+    ]
+
+    if _weighted_nanmean_2d is not None:
+        means = np.full((len(boxes), cube.shape[0]), np.nan)
+        for i, (box_lat, box_lon) in enumerate(box_cells):
+            if len(box_lat) and len(box_lon):
+                lat_run = slice(box_lat[0], box_lat[-1] + 1)
+                lon_run = slice(box_lon[0], box_lon[-1] + 1)
+                means[i] = _weighted_nanmean_2d(cube[:, lat_run, lon_run], cell_weights[lat_run])
+        return means
+
+    # Weight matrix over the flattened (lat, lon) cells
+    values = cube.reshape(cube.shape[0], -1)
+    rows, cols, data = [], [], []
+    for i, (box_lat, box_lon) in enumerate(box_cells):
+        rows.append(np.full(len(box_lat) * len(box_lon), i))
+        cols.append((box_lat[:, None] * len(lon) + box_lon).ravel())
+        data.append(np.repeat(cell_weights[box_lat], len(box_lon)))
+    rows, cols, data = (np.concatenate(parts) for parts in (rows, cols, data))
+    shape = (len(boxes), values.shape[1])
+    if sparse is not None:
+        weights = sparse.csr_matrix((data, (rows, cols)), shape=shape)
+    else:
+        weights = np.zeros(shape)
+        weights[rows, cols] = data
+
+    # Weighted sums over the valid cells, divided by those cells' weights
+    valid = ~np.isnan(values)
+    totals = weights @ np.where(valid, values, 0).T
+    weight_sums = weights @ valid.T.astype(np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.asarray(totals / weight_sums)
+
+
 class RainfallDataFetcher:
     """
     Fetches precipitation data from multiple sources for Asian rice regions.
     The class design allows for fallback between different data sources.
     """
 
+    # Dask chunks matching the files' own chunking, so each chunk read is one
+    # request. CHIRPS names its dimensions latitude/longitude, the NOAA PSL
+    # files (CPC and GPCC) lat/lon.
+    CHIRPS_CHUNKS = {'time': 12, 'latitude': 400, 'longitude': 400}
+    PSL_CHUNKS = {'time': 12, 'lat': 400, 'lon': 400}
+
+    # Complete past years of CHIRPS rarely change, so the part covering our
+    # regions is kept here and reruns read it locally instead of remotely
+    CHIRPS_CACHE_DIR = Path.home() / ".cache" / "chirps"
+    # Attribute of a cache entry recording the server version it was read from
+    CHIRPS_VERSION_ATTR = 'source_version'
+
     def __init__(self):
         # Define major rice-producing regions with their coordinates
         # These coordinates represent agricultural centers in each country
@@ -63,10 +183,102 @@ class RainfallDataFetcher:
             }
         }
 
+        # Bounding boxes of the regions, in region order, and the box
+        # [west, east, south, north] covering all of them
+        boxes = [region_info['box'] for region_info in self.regions.values()]
+        self.region_boxes = boxes
+        self.union_box = [
+            min(box[0] for box in boxes), max(box[1] for box in boxes),
+            min(box[2] for box in boxes), max(box[3] for box in boxes)
+        ]
+
         # Time range for our analysis
         self.start_date = '2008-07-01'
         self.end_date = '2024-12-01'
 
+    @staticmethod
+    def _chirps_file_version(url):
+        """
+        Identify the server's current version of a CHIRPS file by its
+        Last-Modified date and size; None when the server can't be asked.
+        """
+        try:
+            response = requests.head(url, timeout=30, allow_redirects=True)
+            response.raise_for_status()
+        except requests.RequestException:
+            return None
+        return f"{response.headers.get('Last-Modified', '')}|{response.headers.get('Content-Length', '')}"
+
+    def _load_chirps_year(self, url):
+        """
+        Load the precipitation covering every region from one yearly CHIRPS
+        file, from the local cache when it was fetched before.
+        """
+        # Keyed by file URL and area. The entry records the file's version
+        # on the server, so a reprocessed year is fetched again, but when
+        # the server can't be asked the entry is used as it is
+        key = hashlib.sha256(f"{url}|{self.union_box}".encode()).hexdigest()[:16]
+        stem = url.rsplit('/', 1)[-1][:-3]
+        cache_path = self.CHIRPS_CACHE_DIR / f"{stem}.{key}.nc"
+        version = self._chirps_file_version(url)
+
+        if cache_path.exists():
+            with xr.open_dataarray(cache_path) as precip:
+                if version is None or precip.attrs.get(self.CHIRPS_VERSION_ATTR) == version:
+                    precip = precip.load()
+                    precip.attrs.pop(self.CHIRPS_VERSION_ATTR, None)
+                    return precip
+            logger.info(f"CHIRPS {stem} changed on the server, fetching it again")
+
+        with xr.open_dataset(url, decode_times=True, chunks=self.CHIRPS_CHUNKS, engine='netcdf4') as ds:
+            # Load the area covering every region in one read
+            # (variable name is 'precip')
+            west, east, south, north = self.union_box
+            precip = ds['precip'].sel(
+                longitude=slice(west, east),
+                latitude=slice(south, north)
+            ).load()
+
+        # Only complete years are cached; the latest one may still grow
+        if precip.sizes['time'] == 12:
+            self.CHIRPS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+            entry = precip.drop_encoding().assign_attrs({self.CHIRPS_VERSION_ATTR: version or ''})
+            entry.to_netcdf(tmp_path)
+            tmp_path.replace(cache_path)
+            # Drop this year's entries for other areas or older cache keys
+            for stale in self.CHIRPS_CACHE_DIR.glob(f"{stem}.*.nc"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+
+        return precip
+
+    def _fetch_chirps_year(self, base_url, year):
+        """
+        Fetch one year of CHIRPS data and return the monthly regional
+        averages as a dict of region name -> values.
+        """
+        logger.info(f"Fetching CHIRPS data for {year}...")
+
+        # CHIRPS file naming convention
+        filename = f"chirps-v2.0.{year}.monthly.nc"
+        url = base_url + filename
+
+        # Open dataset directly from URL using xarray, or the local cache
+        # This uses OpenDAP protocol for efficient data access
+        precip = self._load_chirps_year(url)
+
+        # Keep only the months inside our date range, so each year lines up
+        # with its dates (the first year starts in July)
+        precip = precip.sel(time=slice(self.start_date[:7], self.end_date[:7]))
+
+        # Calculate spatial average of each region for each month
+        # Weight by latitude to account for grid cell size differences
+        regional_means = _regional_means(precip, self.region_boxes, 'latitude', 'longitude',
+                                         lat_weighted=True)
+
+        return dict(zip(self.regions, regional_means))
+
     def fetch_chirps_data(self):
         """
         Fetch CHIRPS precipitation data via their data server.
@@ -82,68 +294,46 @@ class RainfallDataFetcher:
 
             # Create date range
             dates = pd.date_range(start=self.start_date, end=self.end_date, freq='MS')
-            df_rainfall = pd.DataFrame({'Date': dates})
-
-            # For each region, extract precipitation data
-            for region_name, region_info in self.regions.items():
-                logger.info(f"Fetching CHIRPS data for {region_name}...")
-
-                monthly_precip = []
-
-                # We'll fetch year by year to manage data size
-                for year in range(2008, 2025):
-                    try:
-                        # CHIRPS file naming convention
-                        filename = f"chirps-v2.0.{year}.monthly.nc"
-                        url = base_url + filename
-
-                        # Open dataset directly from URL using xarray
-                        # This uses OpenDAP protocol for efficient data access
-                        with xr.open_dataset(url, decode_times=True) as ds:
-                            # Extract data for the specific region
-                            # Using bounding box for better regional average
-                            west, east, south, north = region_info['box']
-
-                            # Select spatial subset
-                            ds_region = ds.sel(
-                                longitude=slice(west, east),
-                                latitude=slice(south, north)
-                            )
-
-                            # Calculate spatial average for each month
-                            # Weight by latitude to account for grid cell size differences
-                            weights = np.cos(np.deg2rad(ds_region.latitude))
-                            weights = weights / weights.sum()
-
-                            # Extract precipitation (variable name is 'precip')
-                            precip = ds_region['precip']
-
-                            # Calculate weighted mean across space for each time
-                            regional_mean = precip.weighted(weights).mean(['latitude', 'longitude'])
-
-                            # Convert to pandas series
-                            monthly_values = regional_mean.to_pandas()
-                            monthly_precip.extend(monthly_values.values)
-
-                    except Exception as e:
-                        logger.warning(f"Could not fetch CHIRPS data for {year}: {e}")
-                        # Fill with NaN for missing data
-                        months_in_year = 12 if year < 2024 else dates[dates.year == year].shape[0]
-                        monthly_precip.extend([np.nan] * months_in_year)
-
-                # Trim to match our date range
-                monthly_precip = monthly_precip[:len(dates)]
-                df_rainfall[f'{region_name}_rainfall_mm'] = monthly_precip
-
-            # Calculate Asian average (excluding NaN values)
-            rainfall_cols = [col for col in df_rainfall.columns if 'rainfall' in col]
-            df_rainfall['Asia_Avg_Rainfall_mm'] = df_rainfall[rainfall_cols].mean(axis=1, skipna=True)
-
-            # Calculate anomalies
-            long_term_mean = df_rainfall['Asia_Avg_Rainfall_mm'].mean()
-            df_rainfall['Rainfall_Anomaly_pct'] = (
-                    (df_rainfall['Asia_Avg_Rainfall_mm'] - long_term_mean) / long_term_mean * 100
-            )
+            # Columns are collected here and the DataFrame is built once
+            # they are all present, rather than inserting one at a time
+            columns = {'Date': dates}
+
+            # We'll fetch year by year to manage data size
+            years = range(2008, 2025)
+            # Months of each year inside the date range, used to fill years
+            # that fail
+            year_lengths = {
+                year: len(pd.date_range(max(self.start_date, f'{year}-01-01'),
+                                        min(self.end_date, f'{year}-12-01'), freq='MS'))
+                for year in years
+            }
+            year_offsets = np.cumsum([0] + [year_lengths[year] for year in years])
+
+            # Each yearly file is opened once and every region is cut from it,
+            # rather than reopening the same file for each region. Each year
+            # is written into its slice of the region's series; months that
+            # cannot be fetched stay NaN
+            monthly_precip = {
+                region_name: np.full(len(dates), np.nan, dtype=np.float32)
+                for region_name in self.regions
+            }
+            for i, year in enumerate(years):
+                try:
+                    year_precip = self._fetch_chirps_year(base_url, year)
+                    for region_name, values in year_precip.items():
+                        values = values[:year_lengths[year]]
+                        start = year_offsets[i]
+                        monthly_precip[region_name][start:start + len(values)] = values
+
+                except Exception as e:
+                    logger.warning(f"Could not fetch CHIRPS data for {year}: {e}")
+
+            for region_name, region_precip in monthly_precip.items():
+                columns[f'{region_name}_rainfall_mm'] = region_precip
+
+            # Calculate Asian average and anomalies
+            _add_asia_average(columns)
+            df_rainfall = pd.DataFrame(columns)
 
             logger.info("Successfully fetched CHIRPS data")
             return df_rainfall
@@ -165,59 +355,41 @@ class RainfallDataFetcher:
             base_url = "https://psl.noaa.gov/thredds/dodsC/Datasets/cpc_global_precip/"
 
             dates = pd.date_range(start=self.start_date, end=self.end_date, freq='MS')
-            df_rainfall = pd.DataFrame({'Date': dates})
-
-            for region_name, region_info in self.regions.items():
-                logger.info(f"Fetching NOAA data for {region_name}...")
-
-                monthly_precip = []
+            columns = {'Date': dates}
 
-                # NOAA data is organized by variable
-                # Monthly data file
-                url = base_url + "precip.mon.mean.nc"
+            logger.info("Fetching NOAA data for all regions...")
 
-                try:
-                    # Open dataset via OpenDAP
-                    with xr.open_dataset(url, decode_times=True) as ds:
-                        # Select time range
-                        ds_time = ds.sel(time=slice(self.start_date, self.end_date))
-
-                        # Select spatial region
-                        west, east, south, north = region_info['box']
+            # NOAA data is organized by variable
+            # Monthly data file
+            url = base_url + "precip.mon.mean.nc"
 
-                        # Note: NOAA uses 'lat' and 'lon' instead of 'latitude' and 'longitude'
-                        ds_region = ds_time.sel(
-                            lon=slice(west, east),
-                            lat=slice(south, north)
-                        )
+            try:
+                # Open dataset via OpenDAP
+                with xr.open_dataset(url, decode_times=True, chunks=self.PSL_CHUNKS, engine='netcdf4') as ds:
+                    # Select time range
+                    ds_time = ds.sel(time=slice(self.start_date, self.end_date))
 
-                        # Get precipitation data (variable is 'precip')
-                        precip = ds_region['precip']
+                    # Get precipitation data (variable is 'precip')
+                    # Note: NOAA uses 'lat' and 'lon' instead of 'latitude' and 'longitude'
+                    precip = ds_time['precip']
 
-                        # Calculate spatial average
-                        # Convert from mm/day to mm/month
-                        days_per_month = pd.to_datetime(ds_region.time.values).to_series().dt.days_in_month
+                    # Calculate spatial average of each region
+                    # Convert from mm/day to mm/month; scaling the regional
+                    # averages is the same as scaling every cell, and cheaper
+                    days_per_month = ds_time.time.dt.days_in_month.values
 
-                        regional_mean = precip.mean(['lat', 'lon'])
-                        monthly_values = regional_mean.values * days_per_month.values
+                    regional_means = _regional_means(precip, self.region_boxes) * days_per_month
 
-                        monthly_precip = monthly_values.tolist()
+            except Exception as e:
+                logger.warning(f"Could not fetch NOAA data: {e}")
+                regional_means = np.full((len(self.regions), len(dates)), np.nan)
 
-                except Exception as e:
-                    logger.warning(f"Could not fetch NOAA data for {region_name}: {e}")
-                    monthly_precip = [np.nan] * len(dates)
+            for region_name, monthly_values in zip(self.regions, regional_means):
+                columns[f'{region_name}_rainfall_mm'] = np.asarray(monthly_values[:len(dates)])
 
-                df_rainfall[f'{region_name}_rainfall_mm'] = monthly_precip[:len(dates)]
-
-            # Calculate Asian average
-            rainfall_cols = [col for col in df_rainfall.columns if 'rainfall' in col]
-            df_rainfall['Asia_Avg_Rainfall_mm'] = df_rainfall[rainfall_cols].mean(axis=1, skipna=True)
-
-            # Calculate anomalies
-            long_term_mean = df_rainfall['Asia_Avg_Rainfall_mm'].mean()
-            df_rainfall['Rainfall_Anomaly_pct'] = (
-                    (df_rainfall['Asia_Avg_Rainfall_mm'] - long_term_mean) / long_term_mean * 100
-            )
+            # Calculate Asian average and anomalies
+            _add_asia_average(columns)
+            df_rainfall = pd.DataFrame(columns)
 
             logger.info("Successfully fetched NOAA CPC data")
             return df_rainfall
@@ -238,38 +410,23 @@ class RainfallDataFetcher:
             url = "https://psl.noaa.gov/thredds/dodsC/Datasets/gpcc/full_v2018/precip.mon.total.v2018.nc"
 
             dates = pd.date_range(start=self.start_date, end=self.end_date, freq='MS')
-            df_rainfall = pd.DataFrame({'Date': dates})
+            columns = {'Date': dates}
 
-            with xr.open_dataset(url, decode_times=True) as ds:
+            with xr.open_dataset(url, decode_times=True, chunks=self.PSL_CHUNKS, engine='netcdf4') as ds:
                 # Select time range
                 ds_time = ds.sel(time=slice(self.start_date, self.end_date))
 
-                for region_name, region_info in self.regions.items():
-                    logger.info(f"Processing GPCC data for {region_name}...")
-
-                    # Select spatial region
-                    west, east, south, north = region_info['box']
-
-                    ds_region = ds_time.sel(
-                        lon=slice(west, east),
-                        lat=slice(south, north)
-                    )
-
-                    # Calculate regional average
-                    precip = ds_region['precip']
-                    regional_mean = precip.mean(['lat', 'lon'])
+                logger.info("Processing GPCC data for all regions...")
 
-                    df_rainfall[f'{region_name}_rainfall_mm'] = regional_mean.values[:len(dates)]
+                # Calculate regional averages
+                regional_means = _regional_means(ds_time['precip'], self.region_boxes)
 
-            # Calculate Asian average
-            rainfall_cols = [col for col in df_rainfall.columns if 'rainfall' in col]
-            df_rainfall['Asia_Avg_Rainfall_mm'] = df_rainfall[rainfall_cols].mean(axis=1, skipna=True)
+                for region_name, monthly_values in zip(self.regions, regional_means):
+                    columns[f'{region_name}_rainfall_mm'] = np.asarray(monthly_values[:len(dates)])
 
-            # Calculate anomalies
-            long_term_mean = df_rainfall['Asia_Avg_Rainfall_mm'].mean()
-            df_rainfall['Rainfall_Anomaly_pct'] = (
-                    (df_rainfall['Asia_Avg_Rainfall_mm'] - long_term_mean) / long_term_mean * 100
-            )
+            # Calculate Asian average and anomalies
+            _add_asia_average(columns)
+            df_rainfall = pd.DataFrame(columns)
 
             logger.info("Successfully fetched GPCC data")
             return df_rainfall
@@ -2,11 +2,13 @@
 # data-pipeline/sync_complete_final.py
 # The complete production synchronization with all discovered mappings
 
-import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from datetime import datetime
 
-from sync_ultimate import *
+from airtable_sync import SyncConfig
+from sync_ultimate import (
+    UltimateAirTableClient, UltimateProductionPostgreSQLSync, UltimateSyncOrchestrator
+)
 
 class CompleteProductionSync(UltimateProductionPostgreSQLSync):
     """
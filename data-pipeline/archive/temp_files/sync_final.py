@@ -2,12 +2,35 @@
 # data-pipeline/sync_final.py
 # Final synchronization script with comprehensive character handling
 
-import os
+import re
 import sys
 import unicodedata
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from airtable_sync_fixed import *
+from airtable_sync import (
+    PostgreSQLSync, SyncConfig, SyncOrchestrator, _content_hash, _to_pg_text, logger
+)
+from airtable_sync_fixed import FixedAirTableClient
+
+# Separators and brackets become underscores; percent signs become 'pct'
+_SEPARATOR_TRANSLATION = str.maketrans({
+    **{char: '_' for char in ' -/.()[]'},
+    '%': 'pct',
+})
+_NON_ASCII_IDENTIFIER_CHARS = re.compile(r'[^a-z0-9_]')
+_REPEATED_UNDERSCORES = re.compile(r'__+')
+
+
+def _to_array_text(value: Any) -> Optional[str]:
+    """Renders one value as the text PostgreSQL parses for its column type."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    value = _to_pg_text(value)
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
 
 class FinalAirTableClient(FixedAirTableClient):
     """
@@ -20,7 +43,8 @@ class FinalAirTableClient(FixedAirTableClient):
     during synchronization to ensure the names match.
     """
     
-    def _sanitize_column_name(self, name: str) -> str:
+    @staticmethod
+    def _sanitize_column_name(name: str) -> str:
         """
         Sanitizes column names to match what exists in PostgreSQL.
         
@@ -35,35 +59,17 @@ class FinalAirTableClient(FixedAirTableClient):
         3. Remove all non-ASCII characters
         4. Clean up any resulting issues (multiple underscores, etc.)
         """
-        # Start with basic transformations
-        safe = name.lower()
-        
-        # Replace common separators with underscores
-        safe = safe.replace(' ', '_')
-        safe = safe.replace('-', '_')
-        safe = safe.replace('/', '_')
-        safe = safe.replace('.', '_')
-        
-        # Replace parentheses and brackets
-        safe = safe.replace('(', '_')
-        safe = safe.replace(')', '_')
-        safe = safe.replace('[', '_')
-        safe = safe.replace(']', '_')
-        
-        # Handle percentage signs
-        safe = safe.replace('%', 'pct')
+        # Start with basic transformations: separators, brackets and
+        # percentage signs in one pass
+        safe = name.lower().translate(_SEPARATOR_TRANSLATION)
         
         # Remove non-ASCII characters completely
-        # This is the critical step that matches our DDL generation
-        safe = ''.join(char for char in safe if ord(char) < 128)
-        
-        # Clean up the result
-        # Remove any remaining special characters
-        safe = ''.join(c if c.isalnum() or c == '_' else '' for c in safe)
+        # This is the critical step that matches our DDL generation.
+        # Anything else that is not an identifier character goes with them.
+        safe = _NON_ASCII_IDENTIFIER_CHARS.sub('', safe)
         
         # Replace multiple underscores with single underscore
-        while '__' in safe:
-            safe = safe.replace('__', '_')
+        safe = _REPEATED_UNDERSCORES.sub('_', safe)
         
         # Remove leading/trailing underscores
         safe = safe.strip('_')
@@ -98,6 +104,9 @@ class FinalPostgreSQLSync(PostgreSQLSync):
                 'imported_quantity_n': 'imported_quantity_n'
             }
         }
+        
+        # SQL type of every column per table, read on first use
+        self._column_types: Dict[str, Dict[str, str]] = {}
     
     def map_column_name(self, table_name: str, column_name: str) -> str:
         """
@@ -111,65 +120,108 @@ class FinalPostgreSQLSync(PostgreSQLSync):
             return self.column_mappings[table_name].get(column_name, column_name)
         return column_name
     
+    def invalidate_table_columns(self):
+        """Also drops the cached column types, which change with the schema."""
+        super().invalidate_table_columns()
+        self._column_types.clear()
+    
+    def get_column_types(self, table_name: str) -> Dict[str, str]:
+        """
+        Returns each column's SQL type, e.g. 'numeric(5,3)', read once per table.
+        """
+        types = self._column_types.get(table_name)
+        if types is None:
+            self.ensure_content_hash_columns([table_name])
+            conn = self.get_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT attname, format_type(atttypid, atttypmod)
+                        FROM pg_attribute
+                        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+                    """, (f"{self.config.postgres_schema}.{table_name}",))
+                    types = dict(cursor.fetchall())
+            finally:
+                self.return_connection(conn)
+            self._column_types[table_name] = types
+        return types
+    
     def upsert_records(self, table_name: str, records: List[Dict]) -> Tuple[int, int]:
         """
-        Upsert with mapping support.
+        Upsert with mapping support, one statement per column set.
+        
+        AirTable omits empty fields, so records arrive with varying keys.
+        Records are bucketed by the set of their mapped columns - most tables
+        have only a handful of distinct sets. Each bucket is passed as one
+        array per column and expanded server-side with unnest(), so the
+        statement is the same size however many rows it carries, even for
+        wide tables like contracts_hp_ng___2.
+        
+        Each record carries the same content hash the COPY path writes, and
+        existing rows whose hash matches are left alone and counted as
+        neither inserted nor updated.
         """
         if not records:
             return 0, 0
         
-        # Apply column mappings
-        mapped_records = []
+        synced_at = datetime.now()
+        buckets: Dict[frozenset, List[Dict]] = defaultdict(list)
         for record in records:
-            mapped_record = {}
-            for column, value in record.items():
-                mapped_column = self.map_column_name(table_name, column)
-                mapped_record[mapped_column] = value
-            mapped_records.append(mapped_record)
+            mapped_record = {
+                self.map_column_name(table_name, column): value
+                for column, value in record.items()
+            }
+            mapped_record['content_hash'] = _content_hash(mapped_record)
+            buckets[frozenset(mapped_record)].append(mapped_record)
         
+        column_types = self.get_column_types(table_name)
         conn = self.get_connection()
         inserted = 0
         updated = 0
         
         try:
             with conn.cursor() as cursor:
-                for record in mapped_records:
-                    columns = list(record.keys())
-                    columns.append('sync_status')
-                    columns.append('updated_at')
-                    
-                    values = list(record.values())
-                    values.append('synced')
-                    values.append(datetime.now())
+                for signature, bucket in buckets.items():
+                    record_columns = sorted(signature)
+                    columns = record_columns + ['sync_status', 'updated_at']
                     
-                    placeholders = ','.join(['%s'] * len(values))
-                    columns_str = ','.join(columns)
-                    
-                    update_cols = [f"{col} = EXCLUDED.{col}" 
-                                 for col in columns 
-                                 if col != 'airtable_record_id']
-                    update_str = ','.join(update_cols)
+                    # Arrays travel as text[] and are cast to the column type
+                    # on the server, the same way COPY parses its input.
+                    # Unknown columns fall back to text and fail in the INSERT.
+                    arrays = [
+                        [_to_array_text(record[col]) for record in bucket]
+                        for col in record_columns
+                    ]
+                    casts = ','.join(f"%s::text[]::{column_types.get(col, 'text')}[]"
+                                     for col in record_columns)
+                    column_list = ','.join(record_columns)
+                    update_str = ','.join(f"{col} = EXCLUDED.{col}" 
+                                          for col in columns 
+                                          if col != 'airtable_record_id')
                     
                     query = f"""
                     INSERT INTO {self.config.postgres_schema}.{table_name} 
-                    ({columns_str})
-                    VALUES ({placeholders})
+                    ({','.join(columns)})
+                    SELECT {column_list}, 'synced', %s
+                    FROM unnest({casts}) AS s({column_list})
                     ON CONFLICT (airtable_record_id) 
                     DO UPDATE SET {update_str}
+                    WHERE {self.config.postgres_schema}.{table_name}.content_hash
+                          IS DISTINCT FROM EXCLUDED.content_hash
                     RETURNING (xmax = 0) AS inserted
                     """
                     
-                    cursor.execute(query, values)
-                    result = cursor.fetchone()
-                    
-                    if result and result[0]:
-                        inserted += 1
-                    else:
-                        updated += 1
+                    cursor.execute(query, [synced_at] + arrays)
+                    for (was_inserted,) in cursor.fetchall():
+                        if was_inserted:
+                            inserted += 1
+                        else:
+                            updated += 1
                         
                 conn.commit()
-                logger.info(f"Upserted {len(records)} records into {table_name}: "
-                          f"{inserted} inserted, {updated} updated")
+                logger.info(f"Upserted {len(records)} records into {table_name} "
+                            f"in {len(buckets)} column groups: "
+                            f"{inserted} inserted, {updated} updated")
                           
         except Exception as e:
             conn.rollback()
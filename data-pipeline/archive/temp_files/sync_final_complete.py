@@ -2,11 +2,14 @@
 # data-pipeline/sync_final_complete.py
 # The complete, production-ready synchronization system
 
-import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from types import MappingProxyType
+from typing import List
 
-from sync_production import *
+from airtable_sync import SyncConfig, logger
+from sync_production import (
+    ProductionPostgreSQLSync, RobustProductionOrchestrator, ValidatingAirTableClient
+)
 
 class CompleteProductionPostgreSQLSync(ProductionPostgreSQLSync):
     """
@@ -17,35 +20,45 @@ class CompleteProductionPostgreSQLSync(ProductionPostgreSQLSync):
     challenge we encountered and solved.
     """
     
+    # Complete mappings including finished_goods discoveries. Built once at
+    # import and read-only, so every instance shares the same mapping.
+    COLUMN_MAPPINGS = MappingProxyType({
+        'contracts_hp_ng': MappingProxyType({
+            'total_price_incl_transport': 'total_price_incl__transport'
+        }),
+        'contracts_hp_ng___2': MappingProxyType({
+            'total_price_with_vc': 'total_price_with_vc',
+            'imported_quantity_n': 'imported_quantity_n'
+        }),
+        'inventory_movements': MappingProxyType({
+            'bx_a_chin': 'bx_a__chin',
+            'bx_a_dng': 'bx_a_dng',
+            'bx_ngoi_ni': 'bx_ngoi_ni',
+            'bx_ti': 'bx_ti',
+            'bx_tr': 'bx_tr',
+            'bx_thoa': 'bx___thoa',
+            'loss_13pct_from_1_6_2025': 'loss_1_3pct_from_1_6_2025',
+        }),
+        'finished_goods': MappingProxyType({
+            # The quantity field mappings with triple underscores
+            's_lng_theo_u_bao_trong_gi': 's_lng_theo_u_bao___trong_gi',
+            's_lng_theo_u_bao_ngoi_gi': 's_lng_theo_u_bao___ngoi_gi',
+            's_lng_theo_u_bao_trong_gi_ca_2': 's_lng_theo_u_bao___trong_gi_ca_2',
+            's_lng_theo_u_bao_ngoi_gi_ca_2': 's_lng_theo_u_bao___ngoi_gi_ca_2',
+        }),
+    })
+    
     def __init__(self, config: SyncConfig):
         super().__init__(config)
         
-        # Complete mappings including finished_goods discoveries
-        self.column_mappings = {
-            'contracts_hp_ng': {
-                'total_price_incl_transport': 'total_price_incl__transport'
-            },
-            'contracts_hp_ng___2': {
-                'total_price_with_vc': 'total_price_with_vc',
-                'imported_quantity_n': 'imported_quantity_n'
-            },
-            'inventory_movements': {
-                'bx_a_chin': 'bx_a__chin',
-                'bx_a_dng': 'bx_a_dng',
-                'bx_ngoi_ni': 'bx_ngoi_ni',
-                'bx_ti': 'bx_ti',
-                'bx_tr': 'bx_tr',
-                'bx_thoa': 'bx___thoa',
-                'loss_13pct_from_1_6_2025': 'loss_1_3pct_from_1_6_2025',
-            },
-            'finished_goods': {
-                # The quantity field mappings with triple underscores
-                's_lng_theo_u_bao_trong_gi': 's_lng_theo_u_bao___trong_gi',
-                's_lng_theo_u_bao_ngoi_gi': 's_lng_theo_u_bao___ngoi_gi',
-                's_lng_theo_u_bao_trong_gi_ca_2': 's_lng_theo_u_bao___trong_gi_ca_2',
-                's_lng_theo_u_bao_ngoi_gi_ca_2': 's_lng_theo_u_bao___ngoi_gi_ca_2',
-            }
-        }
+        # Subclasses extend the mappings by overriding COLUMN_MAPPINGS
+        self.column_mappings = self.COLUMN_MAPPINGS
+
+def _write_lines(lines: List[str]):
+    """Writes buffered report lines to stdout with a single call."""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+    lines.clear()
 
 class FinalCompleteOrchestrator(RobustProductionOrchestrator):
     """
@@ -88,15 +101,19 @@ def main():
         print("ERROR: Missing AirTable API key")
         return 1
     
-    print("\n" + "="*70)
-    print(" RICE MARKET DATA SYNCHRONIZATION SYSTEM")
-    print(" Final Production Version - All Issues Resolved")
-    print("="*70)
-    print(f" Source: AirTable (Base: {config.airtable_base_id})")
-    print(f" Target: PostgreSQL ({config.postgres_host}:{config.postgres_port})")
-    print(f" Database: {config.postgres_database}")
-    print(f" Mode: {config.sync_mode.upper()}")
-    print("="*70 + "\n")
+    # Report lines are buffered and written a section at a time
+    out = []
+    out.append("\n" + "="*70)
+    out.append(" RICE MARKET DATA SYNCHRONIZATION SYSTEM")
+    out.append(" Final Production Version - All Issues Resolved")
+    out.append("="*70)
+    out.append(f" Source: AirTable (Base: {config.airtable_base_id})")
+    out.append(f" Target: PostgreSQL ({config.postgres_host}:{config.postgres_port})")
+    out.append(f" Database: {config.postgres_database}")
+    out.append(f" Mode: {config.sync_mode.upper()}")
+    out.append("="*70 + "\n")
+    
+    _write_lines(out)
     
     orchestrator = FinalCompleteOrchestrator(config)
     
@@ -108,7 +125,7 @@ def main():
         
         # Generate and save report
         report = orchestrator.generate_sync_report(results)
-        print("\n" + report)
+        out.append("\n" + report)
         
         with open('sync_report.txt', 'w') as f:
             f.write(report)
@@ -117,11 +134,11 @@ def main():
         successful = [r for r in results if r['status'] == 'success']
         failed = [r for r in results if r['status'] == 'failed']
         
-        print("\n" + "="*70)
+        out.append("\n" + "="*70)
         
         if not failed:
-            print(" ✓✓✓ COMPLETE SUCCESS! ✓✓✓")
-            print("="*70)
+            out.append(" ✓✓✓ COMPLETE SUCCESS! ✓✓✓")
+            out.append("="*70)
             
             # Calculate comprehensive statistics
             total_processed = sum(r.get('records_processed', 0) for r in successful)
@@ -129,63 +146,66 @@ def main():
             total_updated = sum(r.get('updated', 0) for r in successful)
             total_time = sum(r.get('duration_seconds', 0) for r in results)
             
-            print(f"\n SYNCHRONIZATION SUMMARY:")
-            print(f" • Tables synchronized: {len(successful)}/8")
-            print(f" • Total records processed: {total_processed:,}")
-            print(f" • New records inserted: {total_inserted:,}")
-            print(f" • Records updated: {total_updated:,}")
-            print(f" • Total processing time: {total_time:.1f} seconds")
+            out.append(f"\n SYNCHRONIZATION SUMMARY:")
+            out.append(f" • Tables synchronized: {len(successful)}/8")
+            out.append(f" • Total records processed: {total_processed:,}")
+            out.append(f" • New records inserted: {total_inserted:,}")
+            out.append(f" • Records updated: {total_updated:,}")
+            out.append(f" • Total processing time: {total_time:.1f} seconds")
             
             if total_processed > 0 and total_time > 0:
                 rate = total_processed / total_time
-                print(f" • Processing rate: {rate:.0f} records/second")
+                out.append(f" • Processing rate: {rate:.0f} records/second")
             
             # Breakdown by table
-            print(f"\n TABLE BREAKDOWN:")
+            out.append(f"\n TABLE BREAKDOWN:")
             for result in successful:
                 if result['records_processed'] > 0:
                     table = result['table']
                     count = result['records_processed']
-                    print(f" • {table}: {count:,} records")
+                    out.append(f" • {table}: {count:,} records")
             
-            print(f"\n YOUR DATA IS NOW FULLY SYNCHRONIZED!")
-            print(f" The PostgreSQL database contains a complete mirror of your")
-            print(f" AirTable data, ready for complex queries and analysis.")
+            out.append(f"\n YOUR DATA IS NOW FULLY SYNCHRONIZED!")
+            out.append(f" The PostgreSQL database contains a complete mirror of your")
+            out.append(f" AirTable data, ready for complex queries and analysis.")
             
-            print(f"\n ACCESS YOUR DATA:")
-            print(f" • pgAdmin: http://localhost:5051")
-            print(f"   (login: admin@ricemarket.local / admin123)")
-            print(f" • Adminer: http://localhost:8081")
-            print(f"   (server: rice_market_postgres, user: rice_admin)")
-            print(f" • Command line:")
-            print(f"   docker exec -it rice_market_postgres psql -U rice_admin -d rice_market_db")
+            out.append(f"\n ACCESS YOUR DATA:")
+            out.append(f" • pgAdmin: http://localhost:5051")
+            out.append(f"   (login: admin@ricemarket.local / admin123)")
+            out.append(f" • Adminer: http://localhost:8081")
+            out.append(f"   (server: rice_market_postgres, user: rice_admin)")
+            out.append(f" • Command line:")
+            out.append(f"   docker exec -it rice_market_postgres psql -U rice_admin -d rice_market_db")
             
-            print(f"\n EXAMPLE QUERIES TO TRY:")
-            print(f" • Total inventory by location:")
-            print(f"   SELECT SUM(closing_balance_tons) FROM airtable_sync.inventory_movements;")
-            print(f" • Recent contracts:")
-            print(f"   SELECT * FROM airtable_sync.contracts_hp_ng ORDER BY contract_date DESC LIMIT 10;")
-            print(f" • Customer summary:")
-            print(f"   SELECT COUNT(*) FROM airtable_sync.customers;")
+            out.append(f"\n EXAMPLE QUERIES TO TRY:")
+            out.append(f" • Total inventory by location:")
+            out.append(f"   SELECT SUM(closing_balance_tons) FROM airtable_sync.inventory_movements;")
+            out.append(f" • Recent contracts:")
+            out.append(f"   SELECT * FROM airtable_sync.contracts_hp_ng ORDER BY contract_date DESC LIMIT 10;")
+            out.append(f" • Customer summary:")
+            out.append(f"   SELECT COUNT(*) FROM airtable_sync.customers;")
             
-            print(f"\n NEXT STEPS:")
-            print(f" 1. Change SYNC_MODE=incremental in .env for faster future syncs")
-            print(f" 2. Schedule this script to run periodically (e.g., every hour)")
-            print(f" 3. Consider setting up monitoring for sync failures")
-            print(f" 4. Deploy to Google Cloud for production use")
+            out.append(f"\n NEXT STEPS:")
+            out.append(f" 1. Change SYNC_MODE=incremental in .env for faster future syncs")
+            out.append(f" 2. Schedule this script to run periodically (e.g., every hour)")
+            out.append(f" 3. Consider setting up monitoring for sync failures")
+            out.append(f" 4. Deploy to Google Cloud for production use")
             
         else:
-            print(" ⚠ Synchronization completed with errors")
+            out.append(" ⚠ Synchronization completed with errors")
             for failure in failed:
-                print(f" ✗ {failure['table']}: {failure.get('error', 'Unknown error')}")
+                out.append(f" ✗ {failure['table']}: {failure.get('error', 'Unknown error')}")
+        
+        out.append("="*70 + "\n")
         
-        print("="*70 + "\n")
+        _write_lines(out)
         
         return 0 if not failed else 1
         
     except Exception as e:
         logger.error(f"Fatal error: {e}")
-        print(f"\n ERROR: {e}")
+        out.append(f"\n ERROR: {e}")
+        _write_lines(out)
         return 1
 
 if __name__ == "__main__":
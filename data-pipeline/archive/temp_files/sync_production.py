@@ -2,11 +2,21 @@
 # data-pipeline/sync_production.py
 # Production sync with data validation and transformation
 
-import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from collections import Counter
+from itertools import compress
+from typing import Dict, List
 
-from run_sync import *
+import numpy as np
+
+from airtable_sync import SyncConfig, logger
+# run_sync.py no longer defines the Production* layer this module was written
+# against; the Final classes it extended are the nearest base that exists
+from sync_final import (
+    FinalAirTableClient,
+    FinalPostgreSQLSync as ProductionPostgreSQLSync,
+    FinalSyncOrchestrator as ProductionSyncOrchestrator,
+)
 
 class ValidatingAirTableClient(FinalAirTableClient):
     """
@@ -18,53 +28,66 @@ class ValidatingAirTableClient(FinalAirTableClient):
     fits within database constraints.
     """
     
+    # Percentage fields per table, stored in DECIMAL(5,3) columns
+    PCT_FIELDS = {
+        'inventory_movements': frozenset(('fat_pct', 'moisture_pct')),
+        'contracts_hp_ng___2': frozenset(('protein_pct', 'ash_pct', 'fibre_pct', 'fat_pct',
+                                          'moisture_pct', 'starch_pct', 'acid_value_pct')),
+    }
+    
+    # DECIMAL(5,3) holds at most 99.999
+    PCT_LIMIT = 99.999
+    
     def transform_record(self, record: Dict, table_name: str) -> Dict:
         """
         Enhanced transform that validates and corrects data values.
         """
+        return self.transform_batch([record], table_name)[0]
+    
+    def transform_batch(self, records: List[Dict], table_name: str) -> List[Dict]:
+        """
+        Transforms a page of records, then validates percentages column-wise.
+        
+        A single pass over the page gathers every numeric percentage value
+        into one flat buffer, alongside the row and field each came from.
+        The scaling and range checks then run as one NumPy operation for the
+        whole page, and the results are written back in a second pass.
+        """
         # First do the standard transformation
-        transformed = super().transform_record(record, table_name)
+        transform = super().transform_record
+        transformed = [transform(record, table_name) for record in records]
         
-        # Now apply table-specific validations and transformations
-        if table_name == 'inventory_movements':
-            # Handle percentage fields that might be stored as whole numbers
-            pct_fields = ['fat_pct', 'moisture_pct']
+        pct_fields = self.PCT_FIELDS.get(table_name)
+        if not pct_fields:
+            return transformed
             
-            for field in pct_fields:
-                if field in transformed and transformed[field] is not None:
-                    value = transformed[field]
-                    if isinstance(value, (int, float)):
-                        # If value is > 1, assume it's a whole number percentage
-                        # and convert to decimal (e.g., 85 -> 0.85)
-                        if value > 1:
-                            transformed[field] = value / 100.0
-                        
-                        # Ensure it fits in DECIMAL(5,3) - max value is 99.999
-                        if transformed[field] > 99.999:
-                            logger.warning(f"Value {value} for {field} exceeds max, capping at 99.999")
-                            transformed[field] = 99.999
-                        elif transformed[field] < -99.999:
-                            logger.warning(f"Value {value} for {field} below min, capping at -99.999")
-                            transformed[field] = -99.999
-                            
-        elif table_name == 'contracts_hp_ng___2':
-            # Similar handling for contract percentage fields
-            pct_fields = ['protein_pct', 'ash_pct', 'fibre_pct', 
-                         'fat_pct', 'moisture_pct', 'starch_pct', 'acid_value_pct']
+        # Only touch the percentage fields that actually occur in each record
+        rows, fields, values = [], [], []
+        for row in transformed:
+            for field in row.keys() & pct_fields:
+                value = row[field]
+                if isinstance(value, (int, float)):
+                    rows.append(row)
+                    fields.append(field)
+                    values.append(value)
+        if not values:
+            return transformed
             
-            for field in pct_fields:
-                if field in transformed and transformed[field] is not None:
-                    value = transformed[field]
-                    if isinstance(value, (int, float)):
-                        if value > 1:
-                            transformed[field] = value / 100.0
-                        
-                        if transformed[field] > 99.999:
-                            logger.warning(f"Value {value} for {field} exceeds max, capping at 99.999")
-                            transformed[field] = 99.999
-                        elif transformed[field] < -99.999:
-                            transformed[field] = -99.999
-                            
+        values = np.array(values, dtype=np.float64)
+        # If value is > 1, assume it's a whole number percentage
+        # and convert to decimal (e.g., 85 -> 0.85)
+        scaled = np.where(values > 1, values / 100.0, values)
+        capped = np.clip(scaled, -self.PCT_LIMIT, self.PCT_LIMIT)
+        
+        out_of_range = np.abs(scaled) > self.PCT_LIMIT
+        if out_of_range.any():
+            for field, count in Counter(compress(fields, out_of_range)).items():
+                logger.warning("Capped %d %s values in %s at +/-%s",
+                               count, field, table_name, self.PCT_LIMIT)
+                
+        for row, field, value in zip(rows, fields, capped.tolist()):
+            row[field] = value
+                
         return transformed
 
 class RobustProductionOrchestrator(ProductionSyncOrchestrator):
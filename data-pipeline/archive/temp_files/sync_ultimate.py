@@ -2,11 +2,20 @@
 # data-pipeline/sync_ultimate.py
 # The ultimate synchronization with complete field name handling
 
-import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
 
-from sync_final_complete import *
+from psycopg2 import sql
+
+from airtable_sync import PostgreSQLSync, SyncConfig, logger
+from sync_final import FinalAirTableClient
+from sync_production import ValidatingAirTableClient
+from sync_final_complete import (
+    CompleteProductionPostgreSQLSync, FinalCompleteOrchestrator, _write_lines
+)
 
 class UltimateAirTableClient(ValidatingAirTableClient):
     """
@@ -17,7 +26,9 @@ class UltimateAirTableClient(ValidatingAirTableClient):
     SQL compatibility.
     """
     
-    def _sanitize_column_name(self, name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _sanitize_column_name(name: str) -> str:
         """
         Enhanced sanitization that prevents invalid SQL identifiers.
         
@@ -25,9 +36,12 @@ class UltimateAirTableClient(ValidatingAirTableClient):
         column name is valid SQL. The key insight is that if a name would
         start with a digit after sanitization, we need to preserve some
         prefix from the original name to maintain validity.
+        
+        The result depends only on the name, so each distinct AirTable
+        field is sanitized once per process rather than once per record.
         """
         # First apply the standard sanitization
-        safe = super()._sanitize_column_name(name)
+        safe = FinalAirTableClient._sanitize_column_name(name)
         
         # Check if the result starts with a digit (invalid SQL)
         if safe and safe[0].isdigit():
@@ -46,11 +60,12 @@ class UltimateProductionPostgreSQLSync(CompleteProductionPostgreSQLSync):
     The ultimate PostgreSQL sync with all mappings including shift times.
     """
     
-    def __init__(self, config: SyncConfig):
-        super().__init__(config)
-        
-        # Add the finished_goods time-based field mappings
-        self.column_mappings['finished_goods'].update({
+    # Add the finished_goods time-based field mappings
+    COLUMN_MAPPINGS = MappingProxyType({
+        **CompleteProductionPostgreSQLSync.COLUMN_MAPPINGS,
+        'finished_goods': MappingProxyType({
+            **CompleteProductionPostgreSQLSync.COLUMN_MAPPINGS['finished_goods'],
+            
             # Shift time mappings
             'n_16h30_19h': 'n_16h30_19h',  # Already correct after fix
             'n_19h_7h': 'n_19h_7h',  # Already correct after fix
@@ -60,16 +75,131 @@ class UltimateProductionPostgreSQLSync(CompleteProductionPostgreSQLSync):
             'ngoi_gi_87k_19_7h_l_cn_ca_m_ca_2': 'ngoi_gi_87k_19_7h_l_cn_ca_m_ca_2',
             'ngoi_gi_87k_19_7h_l_cn_ca_m_ca_3': 'ngoi_gi_87k_19_7h_l_cn_ca_m_ca_3',
             'ngoi_gi_87k_19_7h_l_cn_ca_m_ca_4': 'ngoi_gi_87k_19_7h_l_cn_ca_m_ca_4',
-        })
+        }),
+    })
+    
+    def drop_secondary_indexes(self, table_name: str) -> List[str]:
+        """
+        Drops a table's non-unique indexes ahead of a bulk load.
+        
+        Without them each loaded row only maintains the heap and the unique
+        indexes the upsert needs for ON CONFLICT; the dropped indexes are
+        rebuilt in one sorted pass afterwards. Returns their definitions
+        for restore_indexes.
+        """
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT i.relname, pg_get_indexdef(x.indexrelid)
+                    FROM pg_index x
+                    JOIN pg_class i ON i.oid = x.indexrelid
+                    JOIN pg_class t ON t.oid = x.indrelid
+                    JOIN pg_namespace n ON n.oid = t.relnamespace
+                    WHERE n.nspname = %s AND t.relname = %s
+                      AND NOT x.indisunique AND NOT x.indisprimary
+                """, (self.config.postgres_schema, table_name))
+                indexes = cursor.fetchall()
+                
+                for index_name, definition in indexes:
+                    # Logged so an interrupted load can be repaired by hand
+                    logger.info(f"Dropping index {index_name} for bulk load: {definition}")
+                    
+                # DROP INDEX takes a list, so this is one round trip
+                if indexes:
+                    cursor.execute(sql.SQL("DROP INDEX {}").format(sql.SQL(', ').join(
+                        sql.Identifier(self.config.postgres_schema, index_name)
+                        for index_name, _ in indexes)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.return_connection(conn)
+            
+        return [definition for _, definition in indexes]
+    
+    def restore_indexes(self, table_name: str, definitions: List[str]):
+        """Recreates indexes dropped by drop_secondary_indexes."""
+        if not definitions:
+            return
+            
+        conn = self.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                # Sent as one multi-statement query, so the server runs the
+                # builds back to back without waiting on a round trip each
+                cursor.execute(";\n".join(definitions))
+            conn.commit()
+            logger.info(f"Rebuilt {len(definitions)} indexes on {table_name}")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.return_connection(conn)
+    
+    def upsert_records(self, table_name: str, records: List[Dict]) -> Tuple[int, int]:
+        """
+        Routes full refreshes through COPY and everything else through the
+        batched INSERT path.
+        
+        A full sync reloads every record of a table, which is exactly the
+        bulk load COPY is built for.
+        """
+        if self.config.sync_mode == "full":
+            return self.copy_records(table_name, records)
+        return super().upsert_records(table_name, records)
+    
+    def copy_records(self, table_name: str, records: List[Dict]) -> Tuple[int, int]:
+        """
+        Applies the column mappings, then loads the records with COPY.
+        
+        This reuses PostgreSQLSync's staging path: each batch_size chunk is
+        streamed as CSV into a temporary table and merged with a single
+        INSERT ... ON CONFLICT, so memory stays capped at one chunk.
+        """
+        mapped_records = [
+            {self.map_column_name(table_name, column): value
+             for column, value in record.items()}
+            for record in records
+        ]
+        return PostgreSQLSync.upsert_records(self, table_name, mapped_records)
 
 class UltimateSyncOrchestrator(FinalCompleteOrchestrator):
     """
     The ultimate orchestrator that brings everything together.
     """
+    
+    # Four workers overlap AirTable and PostgreSQL round-trips across tables
+    # while leaving headroom in the connection pool and the AirTable rate limit
+    SYNC_WORKERS = 4
+    
     def __init__(self, config: SyncConfig):
         self.config = config
         self.airtable = UltimateAirTableClient(config)
         self.postgres = UltimateProductionPostgreSQLSync(config)
+        
+    def sync_table(self, table_name: str) -> Dict[str, Any]:
+        """
+        Syncs one table, loading full refreshes without secondary indexes.
+        
+        Incremental syncs touch few rows, so their indexes stay in place.
+        """
+        if self.config.sync_mode != "full":
+            return super().sync_table(table_name)
+            
+        definitions = self.postgres.drop_secondary_indexes(table_name)
+        try:
+            return super().sync_table(table_name)
+        finally:
+            try:
+                self.postgres.restore_indexes(table_name, definitions)
+            except Exception as e:
+                # The sync's own result or error stays the outcome; the
+                # missing indexes are logged so they can be rebuilt by hand
+                logger.error(f"Failed to rebuild indexes on {table_name}: {e}")
+                for definition in definitions:
+                    logger.error(f"Index not restored: {definition}")
 
 def main():
     """
@@ -99,16 +229,20 @@ def main():
         print("ERROR: AirTable API key not configured")
         return 1
     
-    print("\n" + "="*70)
-    print(" 🌾 RICE MARKET DATA SYNCHRONIZATION SYSTEM 🌾")
-    print(" Ultimate Production Version")
-    print("="*70)
-    print(f" Source: AirTable (Base: {config.airtable_base_id})")
-    print(f" Target: PostgreSQL ({config.postgres_host}:{config.postgres_port})")
-    print(f" Database: {config.postgres_database}")
-    print(f" Schema: {config.postgres_schema}")
-    print(f" Mode: {config.sync_mode.upper()}")
-    print("="*70)
+    # Report lines are buffered and written a section at a time
+    out = []
+    out.append("\n" + "="*70)
+    out.append(" 🌾 RICE MARKET DATA SYNCHRONIZATION SYSTEM 🌾")
+    out.append(" Ultimate Production Version")
+    out.append("="*70)
+    out.append(f" Source: AirTable (Base: {config.airtable_base_id})")
+    out.append(f" Target: PostgreSQL ({config.postgres_host}:{config.postgres_port})")
+    out.append(f" Database: {config.postgres_database}")
+    out.append(f" Schema: {config.postgres_schema}")
+    out.append(f" Mode: {config.sync_mode.upper()}")
+    out.append("="*70)
+    
+    _write_lines(out)
     
     orchestrator = UltimateSyncOrchestrator(config)
     
@@ -120,7 +254,7 @@ def main():
         
         # Generate comprehensive report
         report = orchestrator.generate_sync_report(results)
-        print("\n" + report)
+        out.append("\n" + report)
         
         with open('sync_report.txt', 'w') as f:
             f.write(report)
@@ -130,11 +264,11 @@ def main():
         successful = [r for r in results if r['status'] == 'success']
         failed = [r for r in results if r['status'] == 'failed']
         
-        print("\n" + "="*70)
+        out.append("\n" + "="*70)
         
         if not failed:
-            print(" ✅ COMPLETE SUCCESS - ALL DATA SYNCHRONIZED! ✅")
-            print("="*70)
+            out.append(" ✅ COMPLETE SUCCESS - ALL DATA SYNCHRONIZED! ✅")
+            out.append("="*70)
             
             # Calculate comprehensive metrics
             total_processed = sum(r.get('records_processed', 0) for r in successful)
@@ -142,17 +276,17 @@ def main():
             total_updated = sum(r.get('updated', 0) for r in successful)
             total_time = (datetime.now() - start_time).total_seconds()
             
-            print(f"\n 📊 SYNCHRONIZATION METRICS:")
-            print(f" • Tables synchronized: {len(successful)}/8")
-            print(f" • Total records processed: {total_processed:,}")
-            print(f" • New records inserted: {total_inserted:,}")
-            print(f" • Records updated: {total_updated:,}")
-            print(f" • Total processing time: {total_time:.1f} seconds")
+            out.append(f"\n 📊 SYNCHRONIZATION METRICS:")
+            out.append(f" • Tables synchronized: {len(successful)}/8")
+            out.append(f" • Total records processed: {total_processed:,}")
+            out.append(f" • New records inserted: {total_inserted:,}")
+            out.append(f" • Records updated: {total_updated:,}")
+            out.append(f" • Total processing time: {total_time:.1f} seconds")
             
             if total_processed > 0 and total_time > 0:
-                print(f" • Processing rate: {total_processed/total_time:.0f} records/second")
+                out.append(f" • Processing rate: {total_processed/total_time:.0f} records/second")
             
-            print(f"\n 📋 TABLE-BY-TABLE BREAKDOWN:")
+            out.append(f"\n 📋 TABLE-BY-TABLE BREAKDOWN:")
             for result in successful:
                 if result['records_processed'] > 0:
                     table = result['table'].replace('_', ' ').title()
@@ -160,57 +294,60 @@ def main():
                     inserted = result.get('inserted', 0)
                     updated = result.get('updated', 0)
                     duration = result.get('duration_seconds', 0)
-                    print(f" • {table}: {count:,} records ({inserted} new, {updated} updated) in {duration:.1f}s")
+                    out.append(f" • {table}: {count:,} records ({inserted} new, {updated} updated) in {duration:.1f}s")
             
-            print(f"\n 🎉 SUCCESS! Your PostgreSQL database is fully synchronized!")
-            print(f" The rice market data is now available for:")
-            print(f" • Complex SQL queries and reporting")
-            print(f" • Real-time analytics dashboards")
-            print(f" • Integration with other systems")
-            print(f" • Backup and disaster recovery")
+            out.append(f"\n 🎉 SUCCESS! Your PostgreSQL database is fully synchronized!")
+            out.append(f" The rice market data is now available for:")
+            out.append(f" • Complex SQL queries and reporting")
+            out.append(f" • Real-time analytics dashboards")
+            out.append(f" • Integration with other systems")
+            out.append(f" • Backup and disaster recovery")
             
-            print(f"\n 🔗 ACCESS YOUR DATA:")
-            print(f" • pgAdmin web interface: http://localhost:5051")
-            print(f"   Login: admin@ricemarket.local / admin123")
-            print(f" • Adminer interface: http://localhost:8081")
-            print(f"   Server: rice_market_postgres, User: rice_admin, Pass: localdev123")
-            print(f" • Command line:")
-            print(f"   docker exec -it rice_market_postgres psql -U rice_admin -d rice_market_db")
+            out.append(f"\n 🔗 ACCESS YOUR DATA:")
+            out.append(f" • pgAdmin web interface: http://localhost:5051")
+            out.append(f"   Login: admin@ricemarket.local / admin123")
+            out.append(f" • Adminer interface: http://localhost:8081")
+            out.append(f"   Server: rice_market_postgres, User: rice_admin, Pass: localdev123")
+            out.append(f" • Command line:")
+            out.append(f"   docker exec -it rice_market_postgres psql -U rice_admin -d rice_market_db")
             
-            print(f"\n 🔍 INTERESTING QUERIES TO EXPLORE YOUR DATA:")
-            print(f" • Total rice inventory across all warehouses:")
-            print(f"   SELECT SUM(closing_balance_tons) FROM airtable_sync.inventory_movements;")
-            print(f" • Customer distribution:")
-            print(f"   SELECT address, COUNT(*) FROM airtable_sync.customers GROUP BY address;")
-            print(f" • Recent contract values:")
-            print(f"   SELECT contract_date, SUM(total_amount) FROM airtable_sync.contracts_hp_ng")
-            print(f"   WHERE contract_date > CURRENT_DATE - INTERVAL '30 days' GROUP BY contract_date;")
-            print(f" • Production by shift:")
-            print(f"   SELECT COUNT(*), SUM(n_16h30_19h) as evening_shift, SUM(n_19h_7h) as night_shift")
-            print(f"   FROM airtable_sync.finished_goods;")
+            out.append(f"\n 🔍 INTERESTING QUERIES TO EXPLORE YOUR DATA:")
+            out.append(f" • Total rice inventory across all warehouses:")
+            out.append(f"   SELECT SUM(closing_balance_tons) FROM airtable_sync.inventory_movements;")
+            out.append(f" • Customer distribution:")
+            out.append(f"   SELECT address, COUNT(*) FROM airtable_sync.customers GROUP BY address;")
+            out.append(f" • Recent contract values:")
+            out.append(f"   SELECT contract_date, SUM(total_amount) FROM airtable_sync.contracts_hp_ng")
+            out.append(f"   WHERE contract_date > CURRENT_DATE - INTERVAL '30 days' GROUP BY contract_date;")
+            out.append(f" • Production by shift:")
+            out.append(f"   SELECT COUNT(*), SUM(n_16h30_19h) as evening_shift, SUM(n_19h_7h) as night_shift")
+            out.append(f"   FROM airtable_sync.finished_goods;")
             
-            print(f"\n 🚀 NEXT STEPS FOR PRODUCTION:")
-            print(f" 1. Update .env: Set SYNC_MODE=incremental for faster updates")
-            print(f" 2. Schedule syncs: Add to crontab for hourly/daily runs")
-            print(f" 3. Monitor health: Set up alerts for sync failures")
-            print(f" 4. Deploy to cloud: Migrate to Google Cloud SQL when ready")
-            print(f" 5. Build dashboards: Connect Tableau/PowerBI to PostgreSQL")
+            out.append(f"\n 🚀 NEXT STEPS FOR PRODUCTION:")
+            out.append(f" 1. Update .env: Set SYNC_MODE=incremental for faster updates")
+            out.append(f" 2. Schedule syncs: Add to crontab for hourly/daily runs")
+            out.append(f" 3. Monitor health: Set up alerts for sync failures")
+            out.append(f" 4. Deploy to cloud: Migrate to Google Cloud SQL when ready")
+            out.append(f" 5. Build dashboards: Connect Tableau/PowerBI to PostgreSQL")
             
         else:
-            print(" ⚠️  Synchronization completed with errors")
+            out.append(" ⚠️  Synchronization completed with errors")
             for failure in failed:
-                print(f" ✗ {failure['table']}: {failure.get('error', 'Unknown error')}")
-            print("\n Check sync.log for detailed error information")
+                out.append(f" ✗ {failure['table']}: {failure.get('error', 'Unknown error')}")
+            out.append("\n Check sync.log for detailed error information")
             
-        print("="*70)
-        print()
+        out.append("="*70)
+        out.append("")
+        
+        _write_lines(out)
         
         return 0 if not failed else 1
         
     except Exception as e:
         logger.error(f"Fatal synchronization error: {e}", exc_info=True)
-        print(f"\n ❌ FATAL ERROR: {e}")
-        print(f" Check sync.log for full stack trace")
+        out.append(f"\n ❌ FATAL ERROR: {e}")
+        out.append(f" Check sync.log for full stack trace")
+        _write_lines(out)
         return 1
 
 if __name__ == "__main__":
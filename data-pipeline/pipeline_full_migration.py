@@ -6,9 +6,11 @@ import os
 import sys
 import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import psycopg2
-from dotenv import load_dotenv
+from psycopg2 import sql
+from dotenv import dotenv_values
 
 class PipelineMigration:
     def __init__(self):
@@ -20,23 +22,12 @@ class PipelineMigration:
         print(f"\n{'='*70}")
         print(f"STEP: {description}")
         print(f"Command: {cmd}")
-        print(f"{'='*70}")
+        print(f"{'='*70}", flush=True)
         
         try:
-            process = subprocess.Popen(
-                cmd, 
-                shell=True, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
-            )
-            
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    print(line.rstrip())
-            
-            process.wait()
+            # The child inherits our stdout/stderr and writes straight to the
+            # terminal, so nothing is piped back through Python line by line
+            process = subprocess.run(cmd, shell=True, check=False)
             
             if process.returncode == 0:
                 print(f"\n✓ SUCCESS: {description}")
@@ -52,57 +43,75 @@ class PipelineMigration:
             self.results.append(f"✗ {description}: {str(e)}")
             return False
     
-    def clean_gcp_database(self):
-        """Clean all records from GCP PostgreSQL"""
-        print("\n" + "="*70)
-        print("CLEANING GCP DATABASE")
-        print("="*70)
+    def clean_gcp_database(self, log=print):
+        """
+        Clean all records from GCP PostgreSQL.
+        Progress messages go to log, so a caller running this alongside other
+        steps can collect them and print them together.
+        """
+        log("\n" + "="*70)
+        log("CLEANING GCP DATABASE")
+        log("="*70)
         
         # Load GCP config
         if not os.path.exists('data-pipeline/.env.gcp'):
-            print("ERROR: data-pipeline/.env.gcp not found!")
-            print("Please create it from .env.gcp.example")
+            log("ERROR: data-pipeline/.env.gcp not found!")
+            log("Please create it from .env.gcp.example")
             return False
             
-        load_dotenv('data-pipeline/.env.gcp')
+        # Read the GCP settings without touching os.environ, which is shared
+        # with the Docker commands started on another thread
+        gcp = dotenv_values('data-pipeline/.env.gcp')
         
-        gcp_host = os.getenv('POSTGRES_HOST')
+        gcp_host = gcp.get('POSTGRES_HOST')
         if not gcp_host:
-            print("ERROR: POSTGRES_HOST not set in .env.gcp")
+            log("ERROR: POSTGRES_HOST not set in .env.gcp")
             return False
         
         try:
-            print(f"Connecting to GCP Cloud SQL at {gcp_host}...")
+            log(f"Connecting to GCP Cloud SQL at {gcp_host}...")
             conn = psycopg2.connect(
                 host=gcp_host,
-                port=int(os.getenv('POSTGRES_PORT', '5432')),
-                database=os.getenv('POSTGRES_DATABASE', 'rice_market_db'),
-                user=os.getenv('POSTGRES_USER', 'rice_admin'),
-                password=os.getenv('POSTGRES_PASSWORD')
+                port=int(gcp.get('POSTGRES_PORT', '5432')),
+                database=gcp.get('POSTGRES_DATABASE', 'rice_market_db'),
+                user=gcp.get('POSTGRES_USER', 'rice_admin'),
+                password=gcp.get('POSTGRES_PASSWORD')
             )
             cur = conn.cursor()
             
+            # reltuples gives each table's row count from planner statistics,
+            # so reporting what was removed doesn't cost a scan per table
             cur.execute("""
-                SELECT tablename FROM pg_tables 
-                WHERE schemaname = 'airtable_sync' 
-                AND tablename NOT LIKE '%_id_seq'
-                ORDER BY tablename
+                SELECT t.tablename, GREATEST(c.reltuples, 0)::bigint
+                FROM pg_tables t
+                JOIN pg_namespace n ON n.nspname = t.schemaname
+                JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = t.tablename
+                WHERE t.schemaname = 'airtable_sync' 
+                AND t.tablename NOT LIKE '%_id_seq'
+                ORDER BY t.tablename
             """)
             tables = cur.fetchall()
             
-            print(f"Found {len(tables)} tables to clean")
+            log(f"Found {len(tables)} tables to clean")
             
             total_deleted = 0
-            for table in tables:
-                table_name = table[0]
-                cur.execute(f"DELETE FROM airtable_sync.{table_name}")
-                count = cur.rowcount
+            for table_name, count in tables:
                 if count > 0:
-                    print(f"  ✓ Deleted {count} rows from {table_name}")
+                    log(f"  ✓ Deleting ~{count} rows from {table_name}")
                     total_deleted += count
             
+            # One TRUNCATE empties every table in a single statement; unlike
+            # DELETE it doesn't visit rows or leave dead tuples behind
+            if tables:
+                cur.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+                    sql.SQL(', ').join(
+                        sql.Identifier('airtable_sync', table_name)
+                        for table_name, _ in tables
+                    )
+                ))
+            
             conn.commit()
-            print(f"\nTotal records deleted: {total_deleted}")
+            log(f"\nTotal records deleted: ~{total_deleted}")
             cur.close()
             conn.close()
             
@@ -110,32 +119,12 @@ class PipelineMigration:
             return True
             
         except Exception as e:
-            print(f"Error cleaning GCP: {str(e)}")
+            log(f"Error cleaning GCP: {str(e)}")
             self.results.append(f"✗ GCP cleanup failed: {str(e)}")
             return False
     
-    def run_pipeline(self):
-        """Execute complete pipeline"""
-        print("\n" + "#"*70)
-        print("# FULL MIGRATION PIPELINE")
-        print(f"# Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print("#"*70)
-        
-        # Check environment files
-        if not os.path.exists('data-pipeline/.env'):
-            print("\nERROR: data-pipeline/.env not found!")
-            print("Please create it from .env.example")
-            return
-        
-        if not os.path.exists('data-pipeline/.env.gcp'):
-            print("\nERROR: data-pipeline/.env.gcp not found!")
-            print("Please create it from .env.gcp.example")
-            return
-        
-        # Step 1: Clean GCP database
-        if not self.clean_gcp_database():
-            print("⚠ Warning: Failed to clean GCP database, continuing...")
-        
+    def rebuild_docker(self):
+        """Recreate the local Docker stack and wait for PostgreSQL to accept connections"""
         # Step 2: Docker cleanup
         print("\n" + "-"*70)
         print("DOCKER CLEANUP PHASE")
@@ -164,11 +153,67 @@ class PipelineMigration:
             "Start fresh Docker containers"
         )
         
-        print("\n⏳ Waiting 15 seconds for PostgreSQL to fully initialize...")
-        for i in range(15, 0, -1):
-            print(f"   {i} seconds remaining...", end='\r')
-            time.sleep(1)
-        print("   PostgreSQL ready!          ")
+        self.wait_for_local_postgres()
+    
+    def wait_for_local_postgres(self, timeout=30):
+        """Poll the local PostgreSQL until it accepts connections instead of sleeping a fixed time"""
+        # Read the local settings without touching os.environ, as
+        # clean_gcp_database does for the GCP settings
+        local = dotenv_values('data-pipeline/.env')
+        
+        print(f"\n⏳ Waiting up to {timeout} seconds for PostgreSQL to accept connections...")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                psycopg2.connect(
+                    host=local.get('POSTGRES_HOST', 'localhost'),
+                    port=int(local.get('POSTGRES_PORT', '5433')),
+                    database=local.get('POSTGRES_DATABASE', 'rice_market_db'),
+                    user=local.get('POSTGRES_USER', 'rice_admin'),
+                    password=local.get('POSTGRES_PASSWORD'),
+                    connect_timeout=2
+                ).close()
+                print("   PostgreSQL ready!")
+                return True
+            except psycopg2.OperationalError:
+                if time.monotonic() >= deadline:
+                    print("   ⚠ PostgreSQL not ready yet, continuing anyway")
+                    return False
+                time.sleep(1)
+    
+    def run_pipeline(self):
+        """Execute complete pipeline"""
+        print("\n" + "#"*70)
+        print("# FULL MIGRATION PIPELINE")
+        print(f"# Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print("#"*70)
+        
+        # Check environment files
+        if not os.path.exists('data-pipeline/.env'):
+            print("\nERROR: data-pipeline/.env not found!")
+            print("Please create it from .env.example")
+            return
+        
+        if not os.path.exists('data-pipeline/.env.gcp'):
+            print("\nERROR: data-pipeline/.env.gcp not found!")
+            print("Please create it from .env.gcp.example")
+            return
+        
+        # Steps 1-4: the GCP cleanup and the Docker rebuild share nothing,
+        # so the cleanup runs while the images build. The rebuild's steps
+        # print as they run; the cleanup's messages are held back and printed
+        # once both are done, so the two logs don't interleave
+        cleanup_log = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            cleanup = executor.submit(self.clean_gcp_database, cleanup_log.append)
+            rebuild = executor.submit(self.rebuild_docker)
+            
+            rebuild.result()
+            cleaned = cleanup.result()
+        
+        print("\n".join(cleanup_log))
+        if not cleaned:
+            print("⚠ Warning: Failed to clean GCP database, continuing...")
         
         # Step 5: Sync to local Docker
         print("\n" + "-"*70)
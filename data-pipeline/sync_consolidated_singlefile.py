@@ -33,6 +33,13 @@ import requests
 import psycopg2
 from psycopg2.pool import SimpleConnectionPool
 
+# orjson parses AirTable pages straight from bytes and much faster than the
+# stdlib; it is optional and we fall back to requests' json decoding
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ---------- Logging ----------
 logger = logging.getLogger("airtable_sync_onefile")
@@ -235,7 +242,7 @@ class AirtableClient:
                 time.sleep(1.2)
                 continue
             r.raise_for_status()
-            data = r.json()
+            data = orjson.loads(r.content) if orjson is not None else r.json()
             for rec in data.get("records", []):
                 all_recs.append(self._transform_record(rec, table_name))
             offset = data.get("offset")
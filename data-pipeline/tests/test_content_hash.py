@@ -0,0 +1,115 @@
+"""
+Tests for content-hash change detection across sync modes
+
+Full syncs load records with COPY and incremental syncs with unnest().
+Both paths must keep content_hash in step with the row, or a record
+that changes and then changes back is skipped as unchanged by the next
+full sync. These tests need a PostgreSQL server, configured through the
+POSTGRES_* environment variables, and are skipped without one.
+"""
+
+import unittest
+import sys
+import os
+from dataclasses import replace
+
+# Add the sync modules to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'archive'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'archive', 'temp_files'))
+
+import psycopg2
+
+from airtable_sync import SyncConfig
+from sync_ultimate import UltimateProductionPostgreSQLSync
+
+TEST_SCHEMA = 'content_hash_test'
+
+
+class TestContentHash(unittest.TestCase):
+    """Test that every write path keeps content_hash current"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = SyncConfig(
+            airtable_base_id='test',
+            airtable_api_key='',
+            postgres_host=os.getenv('POSTGRES_HOST', 'localhost'),
+            postgres_port=int(os.getenv('POSTGRES_PORT', '5433')),
+            postgres_database=os.getenv('POSTGRES_DB', 'rice_market_db'),
+            postgres_user=os.getenv('POSTGRES_USER', 'rice_admin'),
+            postgres_password=os.getenv('POSTGRES_PASSWORD', 'localdev123'),
+            postgres_schema=TEST_SCHEMA
+        )
+        try:
+            cls.conn = psycopg2.connect(
+                host=cls.config.postgres_host,
+                port=cls.config.postgres_port,
+                database=cls.config.postgres_database,
+                user=cls.config.postgres_user,
+                password=cls.config.postgres_password
+            )
+        except psycopg2.OperationalError as e:
+            raise unittest.SkipTest(f"PostgreSQL not available: {e}")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+            cursor.execute(f"""
+                CREATE TABLE {TEST_SCHEMA}.commodities (
+                    id SERIAL PRIMARY KEY,
+                    airtable_record_id TEXT UNIQUE NOT NULL,
+                    name TEXT,
+                    quantity INTEGER,
+                    sync_status TEXT DEFAULT 'pending',
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+        self.conn.commit()
+
+        self.full_sync = UltimateProductionPostgreSQLSync(replace(self.config, sync_mode='full'))
+        self.incremental_sync = UltimateProductionPostgreSQLSync(
+            replace(self.config, sync_mode='incremental'))
+
+    def tearDown(self):
+        self.full_sync.pool.closeall()
+        self.incremental_sync.pool.closeall()
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {TEST_SCHEMA} CASCADE")
+        self.conn.commit()
+
+    def _stored_row(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"SELECT name, quantity FROM {TEST_SCHEMA}.commodities "
+                           "WHERE airtable_record_id = 'rec1'")
+            row = cursor.fetchone()
+        self.conn.commit()
+        return row
+
+    def test_reverted_record_is_restored_by_full_sync(self):
+        """Test that full -> incremental -> revert -> full stores the reverted record"""
+        original = {'airtable_record_id': 'rec1', 'name': 'Jasmine', 'quantity': 10}
+        changed = {'airtable_record_id': 'rec1', 'name': 'Jasmine 5%', 'quantity': 12}
+
+        self.assertEqual(self.full_sync.upsert_records('commodities', [original]), (1, 0))
+        self.assertEqual(self.incremental_sync.upsert_records('commodities', [changed]), (0, 1))
+        self.assertEqual(self._stored_row(), ('Jasmine 5%', 12))
+
+        self.assertEqual(self.full_sync.upsert_records('commodities', [original]), (0, 1))
+        self.assertEqual(self._stored_row(), ('Jasmine', 10))
+
+    def test_unchanged_record_is_skipped_by_either_path(self):
+        """Test that a record whose hash matches the stored row is not rewritten"""
+        record = {'airtable_record_id': 'rec1', 'name': 'Jasmine', 'quantity': 10}
+
+        self.assertEqual(self.incremental_sync.upsert_records('commodities', [record]), (1, 0))
+        self.assertEqual(self.full_sync.upsert_records('commodities', [record]), (0, 0))
+        self.assertEqual(self.incremental_sync.upsert_records('commodities', [record]), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()